@@ -4,18 +4,32 @@ APRON Abstract Values (Level 1)
 
 :Author: Caterina Urban
 """
+import hashlib
+import json
+import struct
 from _ctypes import Structure, POINTER, byref
 from abc import ABCMeta
-from ctypes import c_size_t, c_char_p, c_bool
-from typing import List, Type, Union
+from copy import deepcopy
+from ctypes import c_size_t, c_char_p, c_bool, c_int, c_void_p, string_at, create_string_buffer, \
+    c_double, addressof, c_uint
+from fractions import Fraction
+from functools import partial, wraps
+from inspect import signature
+from typing import List, Optional, Type, Union
 
 from apronpy.abstract0 import Abstract0
-from apronpy.cdll import libapron
-from apronpy.environment import Environment, PyEnvironment
+from apronpy.cdll import libapron, libc
+from apronpy.coeff import Coeff, CoeffDiscr, PyDoubleScalarCoeff, PyMPQScalarCoeff
+from apronpy.dimension import AP_DIM_MAX, DimChange
+from apronpy.environment import Environment, PyEnvironment, _release
 from apronpy.interval import Interval, PyInterval
-from apronpy.lincons1 import Lincons1Array, PyLincons1Array
+from apronpy.lincons0 import ConsTyp
+from apronpy.lincons1 import Lincons1Array, PyLincons1Array, PyLincons1
+from apronpy.linexpr0 import Linexpr0, LinexprDiscr
 from apronpy.linexpr1 import PyLinexpr1, Linexpr1
-from apronpy.manager import PyManager
+from apronpy.manager import PyManager, MemBuf
+from apronpy.mpfr import MPFR_get_d, Rnd
+from apronpy.scalar import Scalar, ScalarDiscr, APRON_double_set_scalar
 from apronpy.tcons1 import PyTcons1Array, TCons1Array
 from apronpy.texpr1 import PyTexpr1, Texpr1
 from apronpy.var import PyVar
@@ -24,6 +38,107 @@ APRON_assign_linexpr_array = libapron.ap_abstract1_assign_linexpr_array
 APRON_assign_texpr_array = libapron.ap_abstract1_assign_texpr_array
 APRON_substitute_linexpr_array = libapron.ap_abstract1_substitute_linexpr_array
 APRON_substitute_texpr_array = libapron.ap_abstract1_substitute_texpr_array
+APRON_serialize_raw = libapron.ap_abstract0_serialize_raw
+APRON_interval_set_double = libapron['ap_interval_set_double']
+APRON_add_dimensions = libapron.ap_abstract0_add_dimensions
+APRON_bound_dimension = libapron.ap_abstract0_bound_dimension
+APRON_forget_array = libapron.ap_abstract0_forget_array
+
+
+def _scalar_fingerprint(scalar: Scalar) -> Optional[str]:
+    if scalar.discr == ScalarDiscr.AP_SCALAR_MPQ:
+        return 'q{}'.format(scalar)
+    elif scalar.discr == ScalarDiscr.AP_SCALAR_DOUBLE:
+        return 'd{!r}'.format(scalar.val.dbl)
+    return None     # MPFR scalars are not represented exactly
+
+
+def _coeff_fingerprint(coeff: Coeff) -> Optional[str]:
+    if coeff.discr == CoeffDiscr.AP_COEFF_SCALAR:
+        return _scalar_fingerprint(coeff.val.scalar.contents)
+    interval = coeff.val.interval.contents
+    inf = _scalar_fingerprint(interval.inf.contents)
+    sup = _scalar_fingerprint(interval.sup.contents)
+    return '[{},{}]'.format(inf, sup) if inf is not None and sup is not None else None
+
+
+def _linexpr0_fingerprint(linexpr0: Linexpr0) -> Optional[str]:
+    terms = list()
+    for j in range(linexpr0.size):
+        if linexpr0.discr == LinexprDiscr.AP_LINEXPR_DENSE:
+            dim, coeff = j, linexpr0.p.coeff[j]
+        else:  # linexpr0.discr == LinexprDiscr.AP_LINEXPR_SPARSE
+            dim, coeff = linexpr0.p.linterm[j].dim.value, linexpr0.p.linterm[j].coeff
+            if dim == AP_DIM_MAX.value:
+                continue
+        value = _coeff_fingerprint(coeff)
+        if value is None:
+            return None
+        terms.append('{}:{}'.format(dim, value))
+    cst = _coeff_fingerprint(linexpr0.cst)
+    return None if cst is None else '{} {}'.format(' '.join(terms), cst)
+
+
+def _fingerprint(argument) -> Optional[str]:
+    """exact representation of an argument of an operation (or None, if there is none)
+
+    Tree expressions and constraints, and MPFR coefficients, have no exact representation, so
+    operations with such arguments are not memoized.
+    """
+    if argument is None or isinstance(argument, (bool, int, float, str)):
+        return repr(argument)
+    elif isinstance(argument, PyVar):
+        return 'v{!r}'.format(argument.var)
+    elif isinstance(argument, (list, tuple)):
+        items = [_fingerprint(item) for item in argument]
+        return None if None in items else '[{}]'.format(','.join(items))
+    elif isinstance(argument, PyLinexpr1):
+        linexpr0 = _linexpr0_fingerprint(argument.linexpr1.linexpr0.contents)
+        env = argument.linexpr1.env.contents
+        return None if linexpr0 is None else 'e{}{}'.format(env, linexpr0)
+    elif isinstance(argument, PyLincons1Array):
+        array = argument.lincons1array
+        items = list()
+        for i in range(array.lincons0_array.size):
+            lincons0 = array.lincons0_array.p[i]
+            linexpr0 = _linexpr0_fingerprint(lincons0.linexpr0.contents)
+            scalar = _scalar_fingerprint(lincons0.scalar.contents) if lincons0.scalar else ''
+            if linexpr0 is None or scalar is None:
+                return None
+            items.append('{}{}{}'.format(linexpr0, lincons0.constyp, scalar))
+        return 'c{}[{}]'.format(array.env.contents, ';'.join(items))
+    elif isinstance(argument, PyAbstract1):
+        data = argument._serialize_raw()
+        if data is None:
+            return None
+        env = argument.abstract1.env.contents
+        return 'a{}{}'.format(env, hashlib.sha256(data).hexdigest())
+    return None
+
+
+def _memoized(method):
+    """memoize a (non-destructive) operation in the transfer cache of the manager, if any
+
+    Only operations whose arguments all have an exact representation are memoized.
+    """
+    parameters = signature(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.manager.transfer_cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+        arguments = parameters.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        if arguments.arguments.pop('destructive'):
+            return method(self, *args, **kwargs)
+        del arguments.arguments['self']
+        fingerprint = _fingerprint(list(arguments.arguments.values()))
+        if fingerprint is None:
+            return method(self, *args, **kwargs)
+        compute = partial(method, self, *args, **kwargs)
+        return cache.apply(self, method.__name__, fingerprint, compute)
+    return wrapper
 
 
 class Abstract1(Structure):
@@ -40,6 +155,20 @@ class Abstract1(Structure):
     ]
 
 
+class Box1(Structure):
+    """
+    typedef struct ap_box1_t {
+      ap_interval_t** p;
+      ap_environment_t* env;
+    } ap_box1_t;
+    """
+
+    _fields_ = [
+        ('p', POINTER(POINTER(Interval))),
+        ('env', POINTER(Environment))
+    ]
+
+
 class PyAbstract1(metaclass=ABCMeta):
 
     # noinspection PyTypeChecker
@@ -76,9 +205,45 @@ class PyAbstract1(metaclass=ABCMeta):
         else:
             assert isinstance(abstract1_or_environment, PyEnvironment)
             self.abstract1 = libapron.ap_abstract1_top(self.manager, abstract1_or_environment)
+        self.manager.check()
+        if self.manager.tracker is not None:
+            self.manager.tracker.track(self)
+
+    def _update(self, abstract1: Abstract1, destructive: bool):
+        if destructive:
+            self.abstract1 = abstract1
+            self.manager.check()
+            if self.manager.tracker is not None:
+                self.manager.tracker.track(self)
+            return self
+        return type(self)(self.manager, abstract1)
+
+    def closure(self, destructive: bool = False):
+        abstract1 = libapron.ap_abstract1_closure(self.manager, destructive, self)
+        return self._update(abstract1, destructive)
+
+    def _checked(self, result):
+        """the result of a query, once the exception of the manager (if any) is checked"""
+        self.manager.check()
+        return result
+
+    def size(self) -> int:
+        """size of the abstract value, in the (abstract) unit of the domain"""
+        return self._checked(libapron.ap_abstract1_size(self.manager, self))
+
+    def canonicalize(self):
+        libapron.ap_abstract1_canonicalize(self.manager, self)
+        return self._checked(self)
 
-    def closure(self):
-        return type(self)(self.manager, libapron.ap_abstract1_closure(self.manager, False, self))
+    def minimize(self):
+        """minimize the size of the representation of the abstract value, in place"""
+        libapron.ap_abstract1_minimize(self.manager, self)
+        return self._update(self.abstract1, True)
+
+    def approximate(self, algorithm: int = 0):
+        """simplify the abstract value (possibly losing precision), in place"""
+        libapron.ap_abstract1_approximate(self.manager, self, algorithm)
+        return self._update(self.abstract1, True)
 
     @classmethod
     def bottom(cls, manager: PyManager, environment: PyEnvironment):
@@ -92,6 +257,127 @@ class PyAbstract1(metaclass=ABCMeta):
     def top(cls, manager: PyManager, environment: PyEnvironment):
         return cls(manager, environment)
 
+    # noinspection PyTypeChecker
+    @classmethod
+    def from_bounds(cls, manager: PyManager, environment: PyEnvironment, lower, upper):
+        """abstract value bounding each variable (in the order of the dimensions of the
+        environment) between the corresponding lower and upper bounds (e.g., NumPy arrays)"""
+        size = len(environment)
+        assert len(lower) == size and len(upper) == size
+        lower = lower.tolist() if hasattr(lower, 'tolist') else lower
+        upper = upper.tolist() if hasattr(upper, 'tolist') else upper
+        intervals = libapron.ap_interval_array_alloc(size)
+        try:
+            for i, (inf, sup) in enumerate(zip(lower, upper)):
+                APRON_interval_set_double(intervals[i], inf, sup)
+            var_of_dim = environment.environment.contents.var_of_dim
+            a1 = libapron.ap_abstract1_of_box(manager, environment, var_of_dim, intervals, size)
+        finally:
+            libapron.ap_interval_array_free(intervals, size)
+        return cls(manager, a1)
+
+    def _serialize_raw(self):
+        abstract0 = self.abstract1.abstract0
+        try:
+            membuf = self.manager._try_call(APRON_serialize_raw, self.manager, abstract0)
+        except NotImplementedError:
+            return None
+        data = string_at(membuf.ptr, membuf.size)
+        libc.free(membuf.ptr)
+        return self._checked(data)
+
+    @classmethod
+    def _deserialize_raw(cls, manager: PyManager, environment: PyEnvironment, data: bytes):
+        size = c_size_t(len(data))
+        buffer = create_string_buffer(data, len(data))
+        abstract0 = libapron.ap_abstract0_deserialize_raw(manager, buffer, byref(size))
+        if not abstract0:
+            raise ValueError('invalid serialized abstract value')
+        environment.environment.contents.count += 1
+        return cls(manager, Abstract1(abstract0, environment.environment))
+
+    def _serialize_lincons(self):
+        def number(coeff: Coeff):
+            if coeff.discr != CoeffDiscr.AP_COEFF_SCALAR:
+                raise ValueError('interval coefficients cannot be serialized')
+            scalar = coeff.val.scalar.contents
+            if scalar.discr == ScalarDiscr.AP_SCALAR_MPQ:
+                return '{}'.format(scalar)
+            elif scalar.discr == ScalarDiscr.AP_SCALAR_MPFR:
+                return MPFR_get_d(scalar.val.mpfr_ptr, 0)
+            return scalar.val.dbl
+
+        array = self.to_lincons
+        lincons0s = array.lincons1array.lincons0_array
+        result = list()
+        for i in range(lincons0s.size):
+            lincons0 = lincons0s.p[i]
+            if lincons0.scalar:
+                raise ValueError('congruence constraints cannot be serialized')
+            linexpr0 = lincons0.linexpr0.contents
+            terms = list()
+            for j in range(linexpr0.size):
+                if linexpr0.discr == LinexprDiscr.AP_LINEXPR_DENSE:
+                    dim, coeff = j, linexpr0.p.coeff[j]
+                else:  # linexpr0.discr == LinexprDiscr.AP_LINEXPR_SPARSE
+                    dim, coeff = linexpr0.p.linterm[j].dim.value, linexpr0.p.linterm[j].coeff
+                    if dim == AP_DIM_MAX.value:
+                        continue
+                value = number(coeff)
+                if Fraction(value) != 0:
+                    terms.append([dim, value])
+            result.append([lincons0.constyp, number(linexpr0.cst), terms])
+        return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def _deserialize_lincons(cls, manager: PyManager, environment: PyEnvironment, data: bytes):
+        def coeff(value):
+            if isinstance(value, str):
+                value = Fraction(value)
+                return PyMPQScalarCoeff(value.numerator, value.denominator)
+            return PyDoubleScalarCoeff(value)
+
+        env = environment.environment.contents
+        variables = [PyVar(env.var_of_dim[i].decode('utf-8')) for i in range(len(environment))]
+        lincons1s = list()
+        for constyp, cst, terms in json.loads(data.decode('utf-8')):
+            linexpr1 = PyLinexpr1(environment)
+            for dim, value in terms:
+                linexpr1.set_coeff(variables[dim], coeff(value))
+            linexpr1.set_cst(coeff(cst))
+            lincons1s.append(PyLincons1(ConsTyp(constyp), linexpr1))
+        array = PyLincons1Array(lincons1s, environment=environment)
+        return cls.from_constraints(manager, environment, array)
+
+    def serialize(self) -> bytes:
+        """binary representation of the abstract value, including its environment
+
+        The raw representation of the underlying library is used when it is available; otherwise,
+        the abstract value is represented by its constraints (which is exact for boxes, octagons,
+        and polyhedra, but only an over-approximation for the other domains).
+        """
+        environment = self.environment.serialize()
+        data = self._serialize_raw()
+        kind = b'R'
+        if data is None:
+            data = self._serialize_lincons()
+            kind = b'L'
+        return kind + struct.pack('<I', len(environment)) + environment + data
+
+    @classmethod
+    def deserialize(cls, manager: PyManager, data: bytes):
+        kind = data[:1]
+        size, = struct.unpack_from('<I', data, 1)
+        environment = PyEnvironment.deserialize(data[5:5 + size])
+        if kind == b'R':
+            return cls._deserialize_raw(manager, environment, data[5 + size:])
+        elif kind == b'L':
+            return cls._deserialize_lincons(manager, environment, data[5 + size:])
+        raise ValueError('invalid serialized abstract value')
+
+    def __reduce__(self):
+        return type(self).deserialize, (self.manager, self.serialize())
+
     def __deepcopy__(self, memodict=None):
         if memodict is None:
             memodict = {}
@@ -101,6 +387,8 @@ class PyAbstract1(metaclass=ABCMeta):
         return result
 
     def __del__(self):
+        if self.manager.tracker is not None:
+            self.manager.tracker.release(self)
         libapron.ap_abstract1_clear(self.manager, self)
         del self.abstract1
 
@@ -113,17 +401,52 @@ class PyAbstract1(metaclass=ABCMeta):
         assert isinstance(argument, PyAbstract1)
         return argument
 
+    def to_box(self, kind: str = 'intervals'):
+        """bounds of all variables, in the order of the dimensions of the environment
+
+        The bounds are returned as a list of intervals, or as a pair of NumPy arrays of lower and
+        upper bounds, either of kind 'float' (rounded outwards) or of kind 'fraction' (exact);
+        infinite bounds are represented by -inf and inf.
+        """
+        assert kind in ('intervals', 'float', 'fraction')
+        box1 = libapron.ap_abstract1_to_box(self.manager, self)
+        try:
+            self.manager.check()
+            size = box1.env.contents.intdim + box1.env.contents.realdim
+            if kind == 'intervals':
+                return [PyInterval(box1.p[i].contents) for i in range(size)]
+            import numpy
+            if kind == 'float':
+                lower, upper = numpy.empty(size), numpy.empty(size)
+                bound = c_double()
+                for i in range(size):
+                    interval = box1.p[i].contents
+                    APRON_double_set_scalar(byref(bound), interval.inf, Rnd.MPFR_RNDD)
+                    lower[i] = bound.value
+                    APRON_double_set_scalar(byref(bound), interval.sup, Rnd.MPFR_RNDU)
+                    upper[i] = bound.value
+                return lower, upper
+            lower, upper = numpy.empty(size, dtype=object), numpy.empty(size, dtype=object)
+            for i in range(size):
+                interval = box1.p[i].contents
+                lower[i] = interval.inf.contents.fraction()
+                upper[i] = interval.sup.contents.fraction()
+            return lower, upper
+        finally:
+            libapron.ap_box1_clear(byref(box1))
+
     @property
     def to_lincons(self) -> PyLincons1Array:
-        return PyLincons1Array(libapron.ap_abstract1_to_lincons_array(self.manager, self))
+        array = PyLincons1Array(libapron.ap_abstract1_to_lincons_array(self.manager, self))
+        return self._checked(array)
 
     @property
     def to_tcons(self) -> PyTcons1Array:
-        return PyTcons1Array(libapron.ap_abstract1_to_tcons_array(self.manager, self))
+        array = PyTcons1Array(libapron.ap_abstract1_to_tcons_array(self.manager, self))
+        return self._checked(array)
 
     def __repr__(self):
-        array = PyLincons1Array(libapron.ap_abstract1_to_lincons_array(self.manager, self))
-        return '{}'.format(array)
+        return '{}'.format(self.to_lincons)
 
     @property
     def environment(self) -> PyEnvironment:
@@ -133,19 +456,22 @@ class PyAbstract1(metaclass=ABCMeta):
 
     @environment.setter
     def environment(self, environment: PyEnvironment):
+        if self.environment == environment:
+            return
         e_size = len(environment)
-        a1 = libapron.ap_abstract1_change_environment(self.manager, False, self, environment, e_size, False)
-        self.abstract1 = a1
+        man = self.manager
+        a1 = libapron.ap_abstract1_change_environment(man, True, self, environment, e_size, False)
+        self._update(a1, True)
 
     def is_bottom(self):
-        return bool(libapron.ap_abstract1_is_bottom(self.manager, self))
+        return self._checked(bool(libapron.ap_abstract1_is_bottom(self.manager, self)))
 
     def is_top(self):
-        return bool(libapron.ap_abstract1_is_top(self.manager, self))
+        return self._checked(bool(libapron.ap_abstract1_is_top(self.manager, self)))
 
     def __le__(self, other: 'PyAbstract1'):
         assert isinstance(other, PyAbstract1)
-        return bool(libapron.ap_abstract1_is_leq(self.manager, self, other))
+        return self._checked(bool(libapron.ap_abstract1_is_leq(self.manager, self, other)))
 
     def is_leq(self, other: 'PyAbstract1'):
         assert isinstance(other, PyAbstract1)
@@ -153,54 +479,183 @@ class PyAbstract1(metaclass=ABCMeta):
 
     def __eq__(self, other: 'PyAbstract1'):
         assert isinstance(other, PyAbstract1)
-        return bool(libapron.ap_abstract1_is_eq(self.manager, self, other))
+        if self.environment != other.environment:
+            return False
+        return self._checked(bool(libapron.ap_abstract1_is_eq(self.manager, self, other)))
+
+    def _native_hash(self) -> Optional[int]:
+        """hash of the canonical form of the abstract value (or None, if the domain does not
+        implement hashing)"""
+        self.canonicalize()
+        try:
+            result = self.manager._try_call(libapron.ap_abstract1_hash, self.manager, self)
+            return self._checked(result)
+        except NotImplementedError:
+            return None
+
+    def __hash__(self):
+        """hash of the environment and of the canonical form of the abstract value (if the domain
+        implements hashing), consistent with equality"""
+        return hash((hash(self.environment), self._native_hash()))
 
     def is_eq(self, other: 'PyAbstract1'):
         assert isinstance(other, PyAbstract1)
         return self.__eq__(other)
 
     def bound_variable(self, var: PyVar):
-        return PyInterval(libapron.ap_abstract1_bound_variable(self.manager, self, var))
+        bound = PyInterval(libapron.ap_abstract1_bound_variable(self.manager, self, var))
+        return self._checked(bound)
+
+    def bound_dim(self, dim: int):
+        """bounds of the variable with the given dimension in the environment"""
+        env = self.abstract1.env.contents
+        assert 0 <= dim < env.intdim + env.realdim
+        bound = PyInterval(APRON_bound_dimension(self.manager, self.abstract1.abstract0, dim))
+        return self._checked(bound)
 
     def bound_linexpr(self, linexpr: PyLinexpr1):
-        return PyInterval(libapron.ap_abstract1_bound_linexpr(self.manager, self, linexpr))
+        bound = PyInterval(libapron.ap_abstract1_bound_linexpr(self.manager, self, linexpr))
+        return self._checked(bound)
 
     def bound_texpr(self, texpr: PyTexpr1):
-        return PyInterval(libapron.ap_abstract1_bound_texpr(self.manager, self, texpr))
+        bound = PyInterval(libapron.ap_abstract1_bound_texpr(self.manager, self, texpr))
+        return self._checked(bound)
 
-    def meet(self, other: Union['PyAbstract1', PyLincons1Array, PyTcons1Array]):
+    @_memoized
+    def meet(self, other: Union['PyAbstract1', PyLincons1Array, PyTcons1Array],
+             destructive: bool = False):
+        man = self.manager
         if isinstance(other, PyLincons1Array):
-            abstract1 = libapron.ap_abstract1_meet_lincons_array(self.manager, False, self, other)
-            return type(self)(self.manager, abstract1)
+            abstract1 = libapron.ap_abstract1_meet_lincons_array(man, destructive, self, other)
+            return self._update(abstract1, destructive)
         elif isinstance(other, PyTcons1Array):
-            abstract1 = libapron.ap_abstract1_meet_tcons_array(self.manager, False, self, other)
-            return type(self)(self.manager, abstract1)
+            abstract1 = libapron.ap_abstract1_meet_tcons_array(man, destructive, self, other)
+            return self._update(abstract1, destructive)
         else:
             assert isinstance(other, PyAbstract1)
-            abstract1 = libapron.ap_abstract1_meet(self.manager, False, self, other)
-            return type(self)(self.manager, abstract1)
-
-    def join(self, other: 'PyAbstract1'):
+            abstract1 = libapron.ap_abstract1_meet(man, destructive, self, other)
+            return self._update(abstract1, destructive)
+
+    def _extend(self, environment: PyEnvironment, dimchange: POINTER(DimChange),
+                destructive: bool = False):
+        """the abstract value in a larger environment, given the dimension change to it"""
+        if not dimchange:
+            return self
+        previous = self.abstract1.env
+        abstract0 = self.abstract1.abstract0
+        a0 = APRON_add_dimensions(self.manager, destructive, abstract0, dimchange, False)
+        environment.environment.contents.count += 1
+        abstract1 = Abstract1(a0, environment.environment)
+        if destructive:
+            _release(previous)
+        return self._update(abstract1, destructive)
+
+    def join(self, other: 'PyAbstract1', destructive: bool = False):
+        """least upper bound, in the least common environment of the two abstract values"""
         assert isinstance(other, PyAbstract1)
-        return type(self)(self.manager, libapron.ap_abstract1_join(self.manager, False, self, other))
+        left, right = self, other
+        if addressof(self.abstract1.env.contents) != addressof(other.abstract1.env.contents):
+            environment, dimchange1, dimchange2 = self.environment._lce(other.environment)
+            left = self._extend(environment, dimchange1, destructive)
+            right = other._extend(environment, dimchange2)
+        destructive = destructive or left is not self   # the extended value is a temporary
+        abstract1 = libapron.ap_abstract1_join(self.manager, destructive, left, right)
+        return left._update(abstract1, destructive)
+
+    @staticmethod
+    def _extend_all(values: List['PyAbstract1']) -> List['PyAbstract1']:
+        """the abstract values in the least common environment of all of them"""
+        environment = values[0].environment
+        for value in values[1:]:
+            environment = environment | value.environment
+        return [value._extend(environment, value.environment._lce(environment)[1])
+                for value in values]
+
+    @classmethod
+    def join_all(cls, values: List['PyAbstract1']):
+        """least upper bound, in the least common environment of all abstract values"""
+        assert values and all(isinstance(value, PyAbstract1) for value in values)
+        values = cls._extend_all(values)
+        manager = values[0].manager
+        size = len(values)
+        a_typ: Type = Abstract1 * size
+        a_arr = a_typ(*(value.abstract1 for value in values))
+        return cls(manager, libapron.ap_abstract1_join_array(manager, a_arr, size))
+
+    @classmethod
+    def meet_all(cls, values: List['PyAbstract1']):
+        """greatest lower bound, in the least common environment of all abstract values"""
+        assert values and all(isinstance(value, PyAbstract1) for value in values)
+        values = cls._extend_all(values)
+        manager = values[0].manager
+        size = len(values)
+        a_typ: Type = Abstract1 * size
+        a_arr = a_typ(*(value.abstract1 for value in values))
+        return cls(manager, libapron.ap_abstract1_meet_array(manager, a_arr, size))
 
     def widening(self, other: 'PyAbstract1'):
         assert isinstance(other, PyAbstract1)
         return type(self)(self.manager, libapron.ap_abstract1_widening(self.manager, self, other))
 
+    def widening_threshold(self, other: 'PyAbstract1', thresholds: PyLincons1Array):
+        assert isinstance(other, PyAbstract1)
+        assert isinstance(thresholds, PyLincons1Array)
+        man = self.manager
+        abstract1 = libapron.ap_abstract1_widening_threshold(man, self, other, thresholds)
+        return type(self)(self.manager, abstract1)
+
+    def delayed_widening(self, other: 'PyAbstract1', iteration: int, delay: int = 1,
+                         thresholds: PyLincons1Array = None):
+        """join for the first delay iterations, (threshold) widening afterwards"""
+        assert isinstance(other, PyAbstract1)
+        if iteration < delay:
+            return self.join(other)
+        elif thresholds:
+            return self.widening_threshold(other, thresholds)
+        return self.widening(other)
+
+    def narrowing(self, other: 'PyAbstract1'):
+        """refine the directions left unbounded by self with the constraints of other"""
+        assert isinstance(other, PyAbstract1)
+        array = other.to_lincons
+        lincons1s = list()
+        for i in range(len(array)):
+            lincons1 = array.get(i)
+            constyp = lincons1.get_typ()
+            if constyp not in (ConsTyp.AP_CONS_EQ, ConsTyp.AP_CONS_SUPEQ, ConsTyp.AP_CONS_SUP):
+                continue
+            linexpr1 = Linexpr1()
+            linexpr1.linexpr0 = libapron.ap_linexpr0_copy(lincons1.lincons1.lincons0.linexpr0)
+            lincons1.lincons1.env.contents.count += 1
+            linexpr1.env = lincons1.lincons1.env
+            bound = self.bound_linexpr(PyLinexpr1(linexpr1)).interval.contents
+            unbounded = bound.inf.contents.infty() < 0
+            if constyp == ConsTyp.AP_CONS_EQ:
+                unbounded = unbounded or bound.sup.contents.infty() > 0
+            if unbounded:
+                lincons1s.append(lincons1)
+        if lincons1s:
+            return self.meet(PyLincons1Array(lincons1s))
+        return deepcopy(self)
+
     # noinspection PyTypeChecker
-    def assign(self, var_or_vars: PyVar, expr_or_exprs: Union[PyLinexpr1, PyTexpr1]):
+    @_memoized
+    def assign(self, var_or_vars: Union[PyVar, List[PyVar]],
+               expr_or_exprs: Union[PyLinexpr1, PyTexpr1, List[PyLinexpr1], List[PyTexpr1]],
+               destructive: bool = False):
         man = self.manager
         if isinstance(var_or_vars, PyVar):
             var = var_or_vars
             expr = expr_or_exprs
             if isinstance(expr, PyLinexpr1):
-                abstract1 = libapron.ap_abstract1_assign_linexpr(man, False, self, var, expr, None)
-                return type(self)(self.manager, abstract1)
+                abstract1 = libapron.ap_abstract1_assign_linexpr(man, destructive, self,
+                                                                 var, expr, None)
+                return self._update(abstract1, destructive)
             else:
                 assert isinstance(expr, PyTexpr1)
-                abstract1 = libapron.ap_abstract1_assign_texpr(man, False, self, var, expr, None)
-                return type(self)(self.manager, abstract1)
+                abstract1 = libapron.ap_abstract1_assign_texpr(man, destructive, self,
+                                                               var, expr, None)
+                return self._update(abstract1, destructive)
         else:
             assert isinstance(var_or_vars, list)
             assert all(isinstance(var, PyVar) for var in var_or_vars)
@@ -213,8 +668,8 @@ class PyAbstract1(metaclass=ABCMeta):
                 v_arr = v_typ(*(x._as_parameter_ for x in var_or_vars))
                 e_typ: Type = Linexpr1 * e_size
                 e_arr = e_typ(*(e.linexpr1 for e in exprs))
-                a1 = APRON_assign_linexpr_array(man, False, self, v_arr, e_arr, v_size, None)
-                return type(self)(self.manager, a1)
+                a1 = APRON_assign_linexpr_array(man, destructive, self, v_arr, e_arr, v_size, None)
+                return self._update(a1, destructive)
             else:
                 assert all(isinstance(expr, PyTexpr1) for expr in exprs)
                 v_size = len(var_or_vars)
@@ -224,23 +679,26 @@ class PyAbstract1(metaclass=ABCMeta):
                 v_arr = v_typ(*(x._as_parameter_ for x in var_or_vars))
                 e_typ: Type = Texpr1 * e_size
                 e_arr = e_typ(*(e.texpr1.contents for e in exprs))
-                a1 = APRON_assign_texpr_array(man, False, self, v_arr, e_arr, v_size, None)
-                return type(self)(self.manager, a1)
+                a1 = APRON_assign_texpr_array(man, destructive, self, v_arr, e_arr, v_size, None)
+                return self._update(a1, destructive)
 
     # noinspection PyTypeChecker
+    @_memoized
     def substitute(self, var_or_vars: Union[PyVar, List[PyVar]],
-                   expr_or_exprs: Union[PyLinexpr1, PyTexpr1, List[PyLinexpr1], List[PyTexpr1]]):
+                   expr_or_exprs: Union[PyLinexpr1, PyTexpr1, List[PyLinexpr1], List[PyTexpr1]],
+                   destructive: bool = False):
         man = self.manager
         if isinstance(var_or_vars, PyVar):
             var = var_or_vars
             expr = expr_or_exprs
             if isinstance(expr, PyLinexpr1):
-                a1 = libapron.ap_abstract1_substitute_linexpr(man, False, self, var, expr, None)
-                return type(self)(self.manager, a1)
+                a1 = libapron.ap_abstract1_substitute_linexpr(man, destructive, self,
+                                                              var, expr, None)
+                return self._update(a1, destructive)
             else:
                 assert isinstance(expr, PyTexpr1)
-                a1 = libapron.ap_abstract1_substitute_texpr(man, False, self, var, expr, None)
-                return type(self)(self.manager, a1)
+                a1 = libapron.ap_abstract1_substitute_texpr(man, destructive, self, var, expr, None)
+                return self._update(a1, destructive)
         else:
             assert isinstance(var_or_vars, list)
             assert all(isinstance(var, PyVar) for var in var_or_vars)
@@ -253,8 +711,9 @@ class PyAbstract1(metaclass=ABCMeta):
                 v_arr = v_typ(*(x._as_parameter_ for x in var_or_vars))
                 e_typ: Type = Linexpr1 * e_size
                 e_arr = e_typ(*(e.linexpr1 for e in exprs))
-                a1 = APRON_substitute_linexpr_array(man, False, self, v_arr, e_arr, v_size, None)
-                return type(self)(self.manager, a1)
+                a1 = APRON_substitute_linexpr_array(man, destructive, self,
+                                                    v_arr, e_arr, v_size, None)
+                return self._update(a1, destructive)
             else:
                 assert all(isinstance(expr, PyTexpr1) for expr in exprs)
                 v_size = len(var_or_vars)
@@ -264,20 +723,57 @@ class PyAbstract1(metaclass=ABCMeta):
                 v_arr = v_typ(*(x._as_parameter_ for x in var_or_vars))
                 e_typ: Type = Texpr1 * e_size
                 e_arr = e_typ(*(e.texpr1.contents for e in exprs))
-                a1 = APRON_substitute_texpr_array(man, False, self, v_arr, e_arr, v_size, None)
-                return type(self)(self.manager, a1)
+                a1 = APRON_substitute_texpr_array(man, destructive, self,
+                                                  v_arr, e_arr, v_size, None)
+                return self._update(a1, destructive)
 
     # noinspection PyTypeChecker
-    def forget(self, variables: List[PyVar]):
+    @_memoized
+    def forget(self, variables: List[PyVar], destructive: bool = False):
+        man = self.manager
         v_size = len(variables)
         v_typ: Type = c_char_p * v_size
         v_arr = v_typ(*(x._as_parameter_ for x in variables))
-        a1 = libapron.ap_abstract1_forget_array(self.manager, False, self, v_arr, v_size, False)
-        return type(self)(self.manager, a1)
+        a1 = libapron.ap_abstract1_forget_array(man, destructive, self, v_arr, v_size, False)
+        return self._update(a1, destructive)
+
+    def forget_dims(self, dims: List[int], destructive: bool = False):
+        """forget the variables with the given dimensions in the environment"""
+        env = self.abstract1.env.contents
+        assert all(0 <= dim < env.intdim + env.realdim for dim in dims)
+        d_size = len(dims)
+        d_typ: Type = c_uint * d_size
+        d_arr = d_typ(*dims)
+        abstract0 = self.abstract1.abstract0
+        a0 = APRON_forget_array(self.manager, destructive, abstract0, d_arr, d_size, False)
+        if destructive:
+            self.abstract1.abstract0 = a0
+            return self._update(self.abstract1, destructive)
+        self.abstract1.env.contents.count += 1
+        return self._update(Abstract1(a0, self.abstract1.env), destructive)
 
 
 man_p = PyManager
 pya1 = PyAbstract1
+APRON_serialize_raw.argtypes = [man_p, POINTER(Abstract0)]
+APRON_serialize_raw.restype = MemBuf
+APRON_add_dimensions.argtypes = [man_p, c_bool, POINTER(Abstract0), POINTER(DimChange), c_bool]
+APRON_add_dimensions.restype = POINTER(Abstract0)
+APRON_bound_dimension.argtypes = [man_p, POINTER(Abstract0), c_uint]
+APRON_bound_dimension.restype = POINTER(Interval)
+APRON_forget_array.argtypes = [man_p, c_bool, POINTER(Abstract0), POINTER(c_uint), c_size_t, c_bool]
+APRON_forget_array.restype = POINTER(Abstract0)
+libapron.ap_abstract0_deserialize_raw.argtypes = [man_p, c_void_p, POINTER(c_size_t)]
+libapron.ap_abstract0_deserialize_raw.restype = POINTER(Abstract0)
+libc.free.argtypes = [c_void_p]
+libapron.ap_abstract1_size.argtypes = [man_p, pya1]
+libapron.ap_abstract1_size.restype = c_size_t
+libapron.ap_abstract1_canonicalize.argtypes = [man_p, pya1]
+libapron.ap_abstract1_to_box.argtypes = [man_p, pya1]
+libapron.ap_abstract1_to_box.restype = Box1
+libapron.ap_box1_clear.argtypes = [POINTER(Box1)]
+libapron.ap_abstract1_minimize.argtypes = [man_p, pya1]
+libapron.ap_abstract1_approximate.argtypes = [man_p, pya1, c_int]
 libapron.ap_abstract1_copy.argtypes = [man_p, pya1]
 libapron.ap_abstract1_copy.restype = Abstract1
 libapron.ap_abstract1_clear.argtypes = [man_p, pya1]
@@ -287,6 +783,10 @@ pyvar_p = POINTER(c_char_p)
 pyitv_p = POINTER(POINTER(Interval))
 libapron.ap_abstract1_of_box.argtypes = [man_p, PyEnvironment, pyvar_p, pyitv_p, c_size_t]
 libapron.ap_abstract1_of_box.restype = Abstract1
+libapron.ap_interval_array_alloc.argtypes = [c_size_t]
+libapron.ap_interval_array_alloc.restype = pyitv_p
+libapron.ap_interval_array_free.argtypes = [pyitv_p, c_size_t]
+APRON_interval_set_double.argtypes = [POINTER(Interval), c_double, c_double]
 libapron.ap_abstract1_top.argtypes = [man_p, PyEnvironment]
 libapron.ap_abstract1_top.restype = Abstract1
 libapron.ap_abstract1_environment.argtypes = [man_p, pya1]
@@ -299,6 +799,8 @@ libapron.ap_abstract1_is_leq.argtypes = [man_p, pya1, pya1]
 libapron.ap_abstract1_is_leq.restype = c_bool
 libapron.ap_abstract1_is_eq.argtypes = [man_p, pya1, pya1]
 libapron.ap_abstract1_is_eq.restype = c_bool
+libapron.ap_abstract1_hash.argtypes = [man_p, pya1]
+libapron.ap_abstract1_hash.restype = c_int
 libapron.ap_abstract1_bound_linexpr.argtypes = [man_p, pya1, PyLinexpr1]
 libapron.ap_abstract1_bound_linexpr.restype = POINTER(Interval)
 libapron.ap_abstract1_bound_texpr.argtypes = [man_p, pya1, PyTexpr1]
@@ -317,8 +819,15 @@ libapron.ap_abstract1_meet_tcons_array.argtypes = [man_p, c_bool, pya1, PyTcons1
 libapron.ap_abstract1_meet_tcons_array.restype = Abstract1
 libapron.ap_abstract1_join.argtypes = [man_p, c_bool, pya1, pya1]
 libapron.ap_abstract1_join.restype = Abstract1
+libapron.ap_abstract1_join_array.argtypes = [man_p, POINTER(Abstract1), c_size_t]
+libapron.ap_abstract1_join_array.restype = Abstract1
+libapron.ap_abstract1_meet_array.argtypes = [man_p, POINTER(Abstract1), c_size_t]
+libapron.ap_abstract1_meet_array.restype = Abstract1
 libapron.ap_abstract1_widening.argtypes = [man_p, pya1, pya1]
 libapron.ap_abstract1_widening.restype = Abstract1
+pyl1a = PyLincons1Array
+libapron.ap_abstract1_widening_threshold.argtypes = [man_p, pya1, pya1, pyl1a]
+libapron.ap_abstract1_widening_threshold.restype = Abstract1
 libapron.ap_abstract1_closure.argtypes = [man_p, c_bool, pya1]
 libapron.ap_abstract1_closure.restype = Abstract1
 pyl1 = PyLinexpr1
@@ -0,0 +1,251 @@
+"""
+Adaptive Abstract Values
+========================
+
+:Author: Caterina Urban
+"""
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, List, Tuple, Type, Union
+
+from apronpy.abstract1 import PyAbstract1
+from apronpy.box import PyBox, PyBoxDManager
+from apronpy.cdll import libapron
+from apronpy.environment import PyEnvironment
+from apronpy.lincons1 import PyLincons1Array
+from apronpy.linexpr1 import PyLinexpr1
+from apronpy.manager import PyManager, FunId, ApronTimeout, ApronOutOfSpace
+from apronpy.oct import PyOct, PyOctMPQManager
+from apronpy.polka import PyPolka, PyPolkaMPQlooseManager
+from apronpy.tcons1 import PyTcons1Array
+from apronpy.texpr1 import PyTexpr1
+from apronpy.var import PyVar
+
+
+class Ladder:
+    """abstract domains ordered from the most precise to the most efficient, with budgets
+
+    An operation exceeding the time budget (in seconds) or producing a value exceeding the size
+    budget (in the unit of the domain) moves its result down the ladder. While an operation runs
+    in any but the last domain, the size budget and the timeout (in the unit of the domain, which
+    APRON leaves unspecified) are set as options of all its functions, and its exceptions are
+    raised, so that it aborts instead of stalling or blowing up; the options of the managers are
+    restored afterwards. Values are moved back up the ladder after promote_after consecutive
+    operations within the budgets, when they fit the budgets.
+    """
+
+    def __init__(self, domains: List[Tuple[Type[PyAbstract1], PyManager]] = None,
+                 time_budget: float = None, size_budget: int = None, promote_after: int = None,
+                 timeout: int = None):
+        if domains is None:
+            domains = [
+                (PyPolka, PyPolkaMPQlooseManager()),
+                (PyOct, PyOctMPQManager()),
+                (PyBox, PyBoxDManager())
+            ]
+        assert domains
+        self.domains = domains
+        self.time_budget = time_budget
+        self.size_budget = size_budget
+        self.promote_after = promote_after
+        self.timeout = timeout
+        self.demotions = 0
+        self.promotions = 0
+
+    def __len__(self):
+        return len(self.domains)
+
+    @contextmanager
+    def budgets(self, rung: int):
+        """the budgets set as options of the manager at the given rung, and its exceptions raised
+        (unless it is the last one), while the context is active"""
+        _, manager = self.domains[rung]
+        if rung + 1 >= len(self.domains):
+            yield manager
+        else:
+            funids = [FunId(funid) for funid in range(FunId.AP_FUNID_COPY, FunId.AP_FUNID_SIZE)]
+            options = manager.options(funids, timeout=self.timeout,
+                                      max_object_size=self.size_budget)
+            with manager.handling_exceptions('raise'), options:
+                yield manager
+
+    def exceeds(self, value: PyAbstract1, elapsed: float = 0) -> bool:
+        if self.time_budget is not None and elapsed > self.time_budget:
+            return True
+        return self.size_budget is not None and value.size() > self.size_budget
+
+    def convert(self, value: PyAbstract1, rung: int) -> PyAbstract1:
+        """the abstract value in the domain at the given rung of the ladder"""
+        cls, manager = self.domains[rung]
+        if type(value) is cls and value.manager is manager:
+            return value
+        elif type(value) is cls and type(value.manager) is type(manager):   # e.g., unpickled
+            return cls(manager, libapron.ap_abstract1_copy(manager, value))
+        environment = value.environment
+        if value.is_bottom():
+            return cls.bottom(manager, environment)
+        return cls.from_constraints(manager, environment, value.to_lincons)
+
+    def bottom(self, environment: PyEnvironment, rung: int = 0) -> 'PyAdaptive':
+        cls, manager = self.domains[rung]
+        return PyAdaptive(self, cls.bottom(manager, environment), rung)
+
+    def top(self, environment: PyEnvironment, rung: int = 0) -> 'PyAdaptive':
+        cls, manager = self.domains[rung]
+        return PyAdaptive(self, cls.top(manager, environment), rung)
+
+    def from_constraints(self, environment: PyEnvironment, array: PyLincons1Array,
+                         rung: int = 0) -> 'PyAdaptive':
+        cls, manager = self.domains[rung]
+        return PyAdaptive(self, cls.from_constraints(manager, environment, array), rung)
+
+
+class PyAdaptive:
+    """abstract value that moves along a ladder of domains to stay within its budgets"""
+
+    def __init__(self, ladder: Ladder, value: PyAbstract1, rung: int, age: int = 0):
+        self.ladder = ladder
+        self.value = value
+        self.rung = rung
+        self.age = age
+
+    def __repr__(self):
+        return '{}'.format(self.value)
+
+    def __deepcopy__(self, memodict=None):
+        if memodict is None:
+            memodict = {}
+        result = type(self)(self.ladder, self.value.__deepcopy__(memodict), self.rung, self.age)
+        memodict[id(self)] = result
+        return result
+
+    @property
+    def domain(self) -> Type[PyAbstract1]:
+        return self.ladder.domains[self.rung][0]
+
+    @property
+    def environment(self) -> PyEnvironment:
+        return self.value.environment
+
+    @property
+    def to_lincons(self) -> PyLincons1Array:
+        return self.value.to_lincons
+
+    def demote(self) -> 'PyAdaptive':
+        """the value one rung down the ladder (or itself, if it is already at the bottom)"""
+        if self.rung + 1 >= len(self.ladder):
+            return self
+        self.ladder.demotions += 1
+        value = self.ladder.convert(self.value, self.rung + 1)
+        return type(self)(self.ladder, value, self.rung + 1)
+
+    def promote(self) -> 'PyAdaptive':
+        """the value one rung up the ladder, if it fits the budgets there (or itself otherwise)"""
+        if self.rung == 0:
+            return self
+        start = perf_counter()
+        try:
+            with self.ladder.budgets(self.rung - 1):
+                value = self.ladder.convert(self.value, self.rung - 1)
+        except (ApronTimeout, ApronOutOfSpace):
+            return self
+        if self.ladder.exceeds(value, perf_counter() - start):
+            return self
+        self.ladder.promotions += 1
+        return type(self)(self.ladder, value, self.rung - 1)
+
+    def _apply(self, function: Callable[..., PyAbstract1], *others: 'PyAdaptive') -> 'PyAdaptive':
+        ladder = self.ladder
+        rung = max([self.rung] + [other.rung for other in others])
+        while True:
+            start = perf_counter()
+            try:
+                with ladder.budgets(rung):
+                    values = [ladder.convert(x.value, rung) for x in (self, ) + others]
+                    result = function(*values)
+            except (ApronTimeout, ApronOutOfSpace):
+                if rung + 1 >= len(ladder):
+                    raise
+                ladder.demotions += 1
+                rung += 1
+                continue
+            break
+        age = self.age + 1 if rung == self.rung else 0
+        elapsed = perf_counter() - start
+        adaptive = type(self)(ladder, result, rung, age)
+        while rung + 1 < len(ladder) and ladder.exceeds(adaptive.value, elapsed):
+            adaptive = adaptive.demote()
+            rung, elapsed = adaptive.rung, 0
+        if ladder.promote_after is not None and adaptive.age >= ladder.promote_after:
+            adaptive.age = 0
+            return adaptive.promote()
+        return adaptive
+
+    def is_bottom(self):
+        return self.value.is_bottom()
+
+    def is_top(self):
+        return self.value.is_top()
+
+    def __le__(self, other: 'PyAdaptive'):
+        assert isinstance(other, PyAdaptive)
+        rung = max(self.rung, other.rung)
+        return self.ladder.convert(self.value, rung) <= self.ladder.convert(other.value, rung)
+
+    def is_leq(self, other: 'PyAdaptive'):
+        return self.__le__(other)
+
+    def __eq__(self, other: 'PyAdaptive'):
+        assert isinstance(other, PyAdaptive)
+        rung = max(self.rung, other.rung)
+        return self.ladder.convert(self.value, rung) == self.ladder.convert(other.value, rung)
+
+    def is_eq(self, other: 'PyAdaptive'):
+        return self.__eq__(other)
+
+    def bound_variable(self, var: PyVar):
+        return self.value.bound_variable(var)
+
+    def bound_linexpr(self, linexpr: PyLinexpr1):
+        return self.value.bound_linexpr(linexpr)
+
+    def bound_texpr(self, texpr: PyTexpr1):
+        return self.value.bound_texpr(texpr)
+
+    def meet(self, other: Union['PyAdaptive', PyLincons1Array, PyTcons1Array]):
+        if isinstance(other, PyAdaptive):
+            return self._apply(lambda x, y: x.meet(y), other)
+        return self._apply(lambda x: x.meet(other))
+
+    def join(self, other: 'PyAdaptive'):
+        assert isinstance(other, PyAdaptive)
+        return self._apply(lambda x, y: x.join(y), other)
+
+    @classmethod
+    def join_all(cls, values: List['PyAdaptive']):
+        assert values and all(isinstance(value, PyAdaptive) for value in values)
+        return values[0]._apply(lambda *xs: type(xs[0]).join_all(list(xs)), *values[1:])
+
+    def widening(self, other: 'PyAdaptive'):
+        assert isinstance(other, PyAdaptive)
+        return self._apply(lambda x, y: x.widening(y), other)
+
+    def widening_threshold(self, other: 'PyAdaptive', thresholds: PyLincons1Array):
+        assert isinstance(other, PyAdaptive)
+        return self._apply(lambda x, y: x.widening_threshold(y, thresholds), other)
+
+    def narrowing(self, other: 'PyAdaptive'):
+        assert isinstance(other, PyAdaptive)
+        return self._apply(lambda x, y: x.narrowing(y), other)
+
+    def assign(self, var_or_vars: Union[PyVar, List[PyVar]],
+               expr_or_exprs: Union[PyLinexpr1, PyTexpr1, List[PyLinexpr1], List[PyTexpr1]]):
+        return self._apply(lambda x: x.assign(var_or_vars, expr_or_exprs))
+
+    def substitute(self, var_or_vars: Union[PyVar, List[PyVar]],
+                   expr_or_exprs: Union[PyLinexpr1, PyTexpr1, List[PyLinexpr1], List[PyTexpr1]]):
+        return self._apply(lambda x: x.substitute(var_or_vars, expr_or_exprs))
+
+    def forget(self, variables: List[PyVar]):
+        return self._apply(lambda x: x.forget(variables))
+
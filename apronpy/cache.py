@@ -0,0 +1,228 @@
+"""
+Caches of Abstract Values
+=========================
+
+:Author: Caterina Urban
+"""
+import hashlib
+import sqlite3
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Callable, Dict, List, Optional, Union
+from weakref import ref
+
+from apronpy.abstract1 import PyAbstract1
+from apronpy.manager import PyManager
+
+
+class HashConsTable:
+    """hash-consing table sharing a single abstract value among all equal ones
+
+    The table only holds weak references, so values are dropped from it once they are no longer
+    used elsewhere. Interned values must not be modified by destructive operations.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, List[ref]] = dict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(1 for bucket in self.buckets.values() for entry in bucket if entry() is not None)
+
+    def clear(self):
+        self.buckets.clear()
+
+    def intern(self, value: PyAbstract1) -> PyAbstract1:
+        """the value in the table that is equal to the given one, which is added if there is none"""
+        key = hash(value)
+        bucket = [entry for entry in self.buckets.get(key, list()) if entry() is not None]
+        for entry in bucket:
+            candidate = entry()
+            if candidate is value:
+                self.hits += 1
+                return candidate
+            same = type(candidate) is type(value) and candidate.manager is value.manager
+            if same and candidate.environment == value.environment and candidate == value:
+                self.hits += 1
+                return candidate
+        self.misses += 1
+        bucket.append(ref(value))
+        self.buckets[key] = bucket
+        return value
+
+
+class TransferCache:
+    """in-memory cache of the (non-destructive) operations on the abstract values of a manager
+
+    Entries are keyed by the operation, the environment and the canonical hash of the input value
+    (or, if the domain does not implement hashing, a digest of its canonical serialized form),
+    and the fingerprint (i.e., the exact representation) of the other arguments of the operation;
+    a copy of the input value guards against hash collisions. The least recently used entries are
+    evicted once there are more than max_entries of them or, if max_size is given, once the total
+    size of the stored values exceeds max_size (in the unit of the domain). If a policy is given
+    (e.g., PyAbstract1.minimize), it is applied in place to the stored results.
+    """
+
+    def __init__(self, manager: PyManager, max_entries: int = 10000, max_size: int = None,
+                 policy: Callable[[PyAbstract1], object] = None):
+        self.manager = manager
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.policy = policy
+        self.entries: OrderedDict = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        manager.transfer_cache = self
+
+    def __len__(self):
+        return len(self.entries)
+
+    def detach(self):
+        self.clear()
+        if self.manager.transfer_cache is self:
+            self.manager.transfer_cache = None
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    @staticmethod
+    def _hash(value: PyAbstract1):
+        result = value._native_hash()     # also canonicalizes the value
+        if result is None:
+            try:
+                return hashlib.sha256(value.serialize()).digest()
+            except ValueError:  # the value cannot be serialized
+                return hash(str(value.environment))
+        return result
+
+    def apply(self, value: PyAbstract1, operation: str, fingerprint: str,
+              compute: Callable[[], PyAbstract1]) -> PyAbstract1:
+        """cached result of the operation on the given value, computed (and stored) on a miss"""
+        key = (operation, str(value.environment), self._hash(value), fingerprint)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == value:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return deepcopy(entry[1])
+        self.misses += 1
+        result = compute()
+        self._store(key, deepcopy(value), deepcopy(result))
+        return result
+
+    def _store(self, key: tuple, value: PyAbstract1, result: PyAbstract1):
+        if self.policy is not None:
+            self.policy(result)
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[2]
+        size = value.size() + result.size() if self.max_size is not None else 0
+        self.entries[key] = (value, result, size)
+        self.size += size
+        while self.entries and (len(self.entries) > self.max_entries or
+                                self.max_size is not None and self.size > self.max_size):
+            _, (_, _, size) = self.entries.popitem(last=False)
+            self.size -= size
+
+
+class SummaryCache:
+    """persistent cache of (procedure) summaries, keyed by their input abstract value
+
+    Entries are stored in a sqlite database and the least recently used ones are evicted once
+    there are more than max_entries of them. If a policy is given (e.g., PyAbstract1.minimize),
+    it is applied to (a copy of) the summaries before storing them.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000,
+                 policy: Callable[[PyAbstract1], object] = None):
+        self.max_entries = max_entries
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS summaries '
+            '(key BLOB PRIMARY KEY, value BLOB NOT NULL, accessed INTEGER NOT NULL)'
+        )
+        self.connection.execute(
+            'CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed)'
+        )
+        self.connection.commit()
+        self.clock = self.connection.execute('SELECT MAX(accessed) FROM summaries').fetchone()[0]
+        self.clock = self.clock or 0
+        self.count = self.connection.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.count
+
+    @staticmethod
+    def key(value: PyAbstract1, fingerprint: Union[str, bytes]) -> bytes:
+        """canonical hash of the domain, the environment, the (canonical) value, and the code"""
+        manager = value.manager.manager.contents
+        key = hashlib.sha256()
+        key.update(manager.library + b'\0' + manager.version + b'\0')
+        key.update(value.canonicalize().serialize())
+        key.update(fingerprint.encode('utf-8') if isinstance(fingerprint, str) else fingerprint)
+        return key.digest()
+
+    def get(self, value: PyAbstract1, fingerprint: Union[str, bytes]) -> Optional[PyAbstract1]:
+        key = self.key(value, fingerprint)
+        row = self.connection.execute('SELECT value FROM summaries WHERE key = ?', (key,))
+        row = row.fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.clock += 1
+        self.connection.execute(
+            'UPDATE summaries SET accessed = ? WHERE key = ?', (self.clock, key)
+        )
+        self.connection.commit()
+        return type(value).deserialize(value.manager, row[0])
+
+    def put(self, value: PyAbstract1, fingerprint: Union[str, bytes], summary: PyAbstract1):
+        key = self.key(value, fingerprint)
+        if self.policy is not None:
+            summary = deepcopy(summary)
+            self.policy(summary)
+        self.clock += 1
+        data = summary.serialize()
+        cursor = self.connection.execute(
+            'INSERT OR IGNORE INTO summaries (key, value, accessed) VALUES (?, ?, ?)',
+            (key, data, self.clock)
+        )
+        if cursor.rowcount == 0:
+            self.connection.execute(
+                'UPDATE summaries SET value = ?, accessed = ? WHERE key = ?',
+                (data, self.clock, key)
+            )
+        else:
+            self.count += 1
+        excess = self.count - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                'DELETE FROM summaries WHERE key IN '
+                '(SELECT key FROM summaries ORDER BY accessed LIMIT ?)', (excess,)
+            )
+            self.count -= excess
+        self.connection.commit()
+
+    def summarize(self, value: PyAbstract1, fingerprint: Union[str, bytes],
+                  compute: Callable[[PyAbstract1], PyAbstract1]) -> PyAbstract1:
+        """cached summary of the given input value, computed (and stored) on a cache miss"""
+        summary = self.get(value, fingerprint)
+        if summary is None:
+            summary = compute(value)
+            self.put(value, fingerprint, summary)
+        return summary
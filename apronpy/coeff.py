@@ -7,8 +7,10 @@ APRON Coefficients
 from _ctypes import Union, Structure, POINTER, byref
 from abc import ABCMeta
 from copy import deepcopy
-from ctypes import c_uint
+from ctypes import c_uint, c_double, c_long, c_ulong, sizeof
 from enum import IntEnum
+from fractions import Fraction
+from numbers import Number
 
 from apronpy.cdll import libapron
 from apronpy.interval import Interval, PyInterval, PyDoubleInterval, PyMPQInterval, PyMPFRInterval
@@ -70,6 +72,17 @@ class Coeff(Structure):
             assert self.discr == CoeffDiscr.AP_COEFF_SCALAR
             return '{}'.format(self.val.scalar.contents)
 
+    def __float__(self):
+        if self.discr == CoeffDiscr.AP_COEFF_INTERVAL:
+            raise ValueError('interval coefficients cannot be converted to float')
+        return float(self.val.scalar.contents)
+
+    def fraction(self):
+        """exact value of the (scalar) coefficient, see Scalar.fraction"""
+        if self.discr == CoeffDiscr.AP_COEFF_INTERVAL:
+            raise ValueError('interval coefficients cannot be converted to fractions')
+        return self.val.scalar.contents.fraction()
+
 
 class PyCoeff(metaclass=ABCMeta):
 
@@ -148,6 +161,26 @@ libapron.ap_coeff_set_interval.argtypes = [PyCoeff, PyInterval]
 libapron.ap_coeff_cmp.argtypes = [PyCoeff, PyCoeff]
 libapron.ap_coeff_neg.argtypes = [PyCoeff, PyCoeff]
 
+APRON_coeff_set_scalar_double = libapron.ap_coeff_set_scalar_double
+APRON_coeff_set_scalar_frac = libapron.ap_coeff_set_scalar_frac
+LONG_MAX = 2 ** (8 * sizeof(c_long) - 1) - 1
+ULONG_MAX = 2 ** (8 * sizeof(c_ulong)) - 1
+
+
+def set_number(coeff: POINTER(Coeff), value: Number):
+    """set a coefficient to a number: floats as doubles, integers and fractions exactly"""
+    if isinstance(value, float):
+        APRON_coeff_set_scalar_double(coeff, value)
+    else:
+        value = Fraction(value)
+        if abs(value.numerator) > LONG_MAX or value.denominator > ULONG_MAX:
+            raise ValueError('coefficient {} does not fit in a C long'.format(value))
+        APRON_coeff_set_scalar_frac(coeff, value.numerator, value.denominator)
+
+
+APRON_coeff_set_scalar_double.argtypes = [POINTER(Coeff), c_double]
+APRON_coeff_set_scalar_frac.argtypes = [POINTER(Coeff), c_long, c_ulong]
+
 
 class PyScalarCoeff(PyCoeff, metaclass=ABCMeta):
 
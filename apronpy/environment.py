@@ -4,9 +4,11 @@ APRON Environments
 
 :Author: Caterina Urban
 """
+import struct
+from collections import OrderedDict
 from _ctypes import Structure, POINTER, byref
-from ctypes import c_size_t, c_char_p
-from typing import List, Type, Union
+from ctypes import c_size_t, c_char_p, addressof
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from apronpy.cdll import libapron
 from apronpy.dimension import Dim, AP_DIM_MAX, DimChange, DimPerm
@@ -51,32 +53,138 @@ class Environment(Structure):
         return result
 
 
+_Key = Tuple[Tuple[bytes, ...], Tuple[bytes, ...]]
+_interned: Dict[_Key, POINTER(Environment)] = dict()
+MAX_INTERNED = 1024     # number of interned environments above which the unused ones are freed
+_live = 0               # number of interned environments in use at the last sweep
+MAX_LCES = 1024     # maximum number of cached least common environments
+_lces: 'OrderedDict[Tuple[int, int], tuple]' = OrderedDict()
+_dims: Dict[int, Optional[Dict[bytes, int]]] = dict()
+
+
+def _names(variables: Iterable[PyVar]) -> Tuple[bytes, ...]:
+    return tuple(sorted(x._as_parameter_ for x in variables)) if variables is not None else ()
+
+
+def _key(environment: POINTER(Environment)) -> _Key:
+    """the (sorted) names of the integer and real variables of the environment"""
+    env = environment.contents
+    names = env.var_of_dim[:env.intdim + env.realdim]
+    return tuple(names[:env.intdim]), tuple(names[env.intdim:])
+
+
+def _release(environment: POINTER(Environment)):
+    if environment.contents.count <= 1:
+        libapron.ap_environment_free2(environment)
+    else:
+        environment.contents.count -= 1
+
+
+def _sweep():
+    """free the interned environments that are no longer in use (i.e., only held by the table)"""
+    global _live
+    for key in [key for key, env in _interned.items() if env.contents.count <= 1]:
+        environment = _interned.pop(key)
+        _dims.pop(addressof(environment.contents), None)
+        _release(environment)
+    _live = len(_interned)
+
+
+def _insert(key: _Key, environment: POINTER(Environment)):
+    """intern the given environment, taking over a reference to it
+
+    Once the table doubles in size since the last sweep (and exceeds MAX_INTERNED), the unused
+    environments are freed, so that temporary environments do not accumulate.
+    """
+    if len(_interned) >= max(MAX_INTERNED, 2 * _live):
+        _sweep()
+    _interned[key] = environment
+    _dims[addressof(environment.contents)] = None
+
+
+# noinspection PyTypeChecker
+def _interned_environment(key: _Key) -> POINTER(Environment):
+    """a new reference to the interned environment with the given (sorted) variable names"""
+    environment = _interned.get(key)
+    if environment is None:
+        int_names, real_names = key
+        int_arr = (c_char_p * len(int_names))(*int_names)
+        real_arr = (c_char_p * len(real_names))(*real_names)
+        environment = libapron.ap_environment_alloc(
+            int_arr, len(int_names), real_arr, len(real_names)
+        )
+        if not environment:
+            raise ValueError('clashing variable names')
+        _insert(key, environment)    # the reference owned by the table
+    environment.contents.count += 1
+    return environment
+
+
+def _intern(environment: POINTER(Environment)) -> POINTER(Environment):
+    """the interned environment equal to the given one, whose reference is taken over"""
+    key = _key(environment)
+    interned = _interned.get(key)
+    if interned is None:
+        environment.contents.count += 1
+        _insert(key, environment)
+        return environment
+    if addressof(interned.contents) != addressof(environment.contents):
+        _release(environment)
+        interned.contents.count += 1
+    return interned
+
+
+def _dims_of(environment: POINTER(Environment)) -> Optional[Dict[bytes, int]]:
+    """the dimensions of the variables (by name) of an interned environment (or None otherwise)"""
+    address = addressof(environment.contents)
+    dims = _dims.get(address)
+    if dims is None and address in _dims:
+        env = environment.contents
+        names = env.var_of_dim[:env.intdim + env.realdim]
+        dims = {name: dim for dim, name in enumerate(names)}
+        _dims[address] = dims
+    return dims
+
+
+def _drop_lce(entry: tuple):
+    environment1, environment2, environment, dimchange1, dimchange2 = entry
+    for dimchange in (dimchange1, dimchange2):
+        if dimchange:
+            libapron.ap_dimchange_free(dimchange)
+    for env in (environment1, environment2, environment):
+        _release(env)
+
+
+def clear_interned():
+    """drop the references to the interned environments and to the cached least common
+    environments (which are freed once no longer in use), and free the cached dimension changes"""
+    global _live
+    for entry in _lces.values():
+        _drop_lce(entry)
+    _lces.clear()
+    for environment in _interned.values():
+        _release(environment)
+    _interned.clear()
+    _dims.clear()
+    _live = 0
+
+
 class PyEnvironment:
+    """environment of integer and real variables
+
+    Environments built from lists of variables (or by adding, removing, or renaming variables)
+    are interned: all equal environments share a single ap_environment_t, so that they are
+    allocated only once and compared by pointer equality. Interned environments no longer in use
+    are freed once there are more than MAX_INTERNED of them.
+    """
 
-    # noinspection PyTypeChecker
     def __init__(self, environment_or_int_vars: Union[POINTER(Environment), List[PyVar]] = None,
                  real_vars: List[PyVar] = None):
         if isinstance(environment_or_int_vars, POINTER(Environment)):
             self.environment = environment_or_int_vars
         else:
-            if environment_or_int_vars:
-                int_size = len(environment_or_int_vars)
-                typ: Type = c_char_p * int_size
-                int_arr = typ(*(x._as_parameter_ for x in environment_or_int_vars))
-            else:
-                int_size = 0
-                int_arr = None
-            if real_vars:
-                real_size = len(real_vars)
-                typ: Type = c_char_p * real_size
-                real_arr = typ(*(x._as_parameter_ for x in real_vars))
-            else:
-                real_size = 0
-                real_arr = None
-            environment = libapron.ap_environment_alloc(int_arr, int_size, real_arr, real_size)
-            self.environment = environment
-            if not self.environment:
-                raise ValueError('clashing variable names')
+            key = (_names(environment_or_int_vars), _names(real_vars))
+            self.environment = _interned_environment(key)
 
     def __deepcopy__(self, memodict=None):
         if memodict is None:
@@ -85,13 +193,28 @@ class PyEnvironment:
         memodict[id(self)] = self
         return self
 
+    def serialize(self) -> bytes:
+        """binary representation: number of integer and real variables, followed by their names"""
+        env = self.environment.contents
+        names = b'\0'.join(env.var_of_dim[i] for i in range(env.intdim + env.realdim))
+        return struct.pack('<II', env.intdim, env.realdim) + names
+
+    # noinspection PyTypeChecker
+    @classmethod
+    def deserialize(cls, data: bytes):
+        int_size, real_size = struct.unpack_from('<II', data)
+        names = data[8:].split(b'\0') if int_size + real_size > 0 else list()
+        assert len(names) == int_size + real_size
+        key = (tuple(sorted(names[:int_size])), tuple(sorted(names[int_size:])))
+        return cls(_interned_environment(key))
+
+    def __reduce__(self):
+        return type(self).deserialize, (self.serialize(),)
+
     def __del__(self):
         if self.environment:
-            if self.environment.contents.count <= 1:
-                libapron.ap_environment_free2(self)
-                del self.environment
-            else:
-                self.environment.contents.count -= 1
+            _release(self.environment)
+            del self.environment
 
     @property
     def _as_parameter_(self):
@@ -102,54 +225,47 @@ class PyEnvironment:
         assert isinstance(argument, PyEnvironment)
         return argument
 
-    # noinspection PyTypeChecker
+    def _replace(self, key: _Key):
+        environment = _interned_environment(key)
+        _release(self.environment)
+        self.environment = environment
+
     def add(self, int_vars: List[PyVar] = None, real_vars: List[PyVar] = None):
-        if int_vars:
-            i_size = len(int_vars)
-            typ: Type = c_char_p * i_size
-            int_arr = typ(*(x._as_parameter_ for x in int_vars))
-        else:
-            i_size = 0
-            int_arr = None
-        if real_vars:
-            r_size = len(real_vars)
-            typ: Type = c_char_p * r_size
-            real_arr = typ(*(x._as_parameter_ for x in real_vars))
-        else:
-            r_size = 0
-            real_arr = None
-        self.environment = libapron.ap_environment_add(self, int_arr, i_size, real_arr, r_size)
-        if not self.environment:
-            raise ValueError('clashing variable names')
+        return self.add_many(int_vars, real_vars)
+
+    def add_many(self, int_vars: Iterable[PyVar] = None, real_vars: Iterable[PyVar] = None):
+        """add a batch of integer and real variables, given as any iterables"""
+        int_names, real_names = _key(self.environment)
+        self._replace((tuple(sorted(int_names + _names(int_vars))),
+                       tuple(sorted(real_names + _names(real_vars)))))
         return self
 
-    # noinspection PyTypeChecker
     def rename(self, old_vars: List[PyVar], new_vars: List[PyVar]):
-        o_size = len(old_vars)
-        n_size = len(new_vars)
-        assert o_size == n_size
-        old_typ: Type = c_char_p * o_size
-        old_arr = old_typ(*(x._as_parameter_ for x in old_vars))
-        new_typ: Type = c_char_p * o_size
-        new_arr = new_typ(*(x._as_parameter_ for x in new_vars))
-        p = DimPerm()
-        self.environment = libapron.ap_environment_rename(self, old_arr, new_arr, o_size, p)
-        if not self.environment:
+        assert len(old_vars) == len(new_vars)
+        int_names, real_names = _key(self.environment)
+        renaming = dict(zip((x._as_parameter_ for x in old_vars),
+                            (x._as_parameter_ for x in new_vars)))
+        if len(renaming) != len(old_vars) or not set(renaming).issubset(int_names + real_names):
+            raise ValueError('invalid renaming')
+        int_names = tuple(sorted(renaming.get(name, name) for name in int_names))
+        real_names = tuple(sorted(renaming.get(name, name) for name in real_names))
+        try:
+            self._replace((int_names, real_names))
+        except ValueError:
             raise ValueError('invalid renaming')
         return self
 
-    # noinspection PyTypeChecker
     def remove(self, del_vars: List[PyVar] = None):
-        if del_vars:
-            size = len(del_vars)
-            typ: Type = c_char_p * size
-            arr = typ(*(x._as_parameter_ for x in del_vars))
-        else:
-            size = 0
-            arr = None
-        self.environment = libapron.ap_environment_remove(self, arr, size)
-        if not self.environment:
+        return self.remove_many(del_vars)
+
+    def remove_many(self, del_vars: Iterable[PyVar] = None):
+        """remove a batch of variables, given as any iterable"""
+        int_names, real_names = _key(self.environment)
+        names = set(_names(del_vars))
+        if not names.issubset(int_names + real_names):
             raise ValueError('non-existing variable(s)')
+        self._replace((tuple(name for name in int_names if name not in names),
+                       tuple(name for name in real_names if name not in names)))
         return self
 
     def __repr__(self):
@@ -160,7 +276,26 @@ class PyEnvironment:
 
     def __contains__(self, item: 'PyVar'):
         assert isinstance(item, PyVar)
-        return libapron.ap_environment_dim_of_var(self, item) != AP_DIM_MAX
+        dims = _dims_of(self.environment)
+        if dims is None:
+            return libapron.ap_environment_dim_of_var(self, item) != AP_DIM_MAX
+        return item._as_parameter_ in dims
+
+    def dim_of(self, var: PyVar) -> int:
+        """dimension of the variable in the environment
+
+        The dimensions of the variables of an interned environment are looked up in a dictionary,
+        which is built once for each environment.
+        """
+        assert isinstance(var, PyVar)
+        dims = _dims_of(self.environment)
+        if dims is None:
+            dim = libapron.ap_environment_dim_of_var(self, var).value
+        else:
+            dim = dims.get(var._as_parameter_, AP_DIM_MAX.value)
+        if dim == AP_DIM_MAX.value:
+            raise ValueError('{} is not in the environment'.format(var))
+        return dim
 
     def __lt__(self, other: 'PyEnvironment'):
         assert isinstance(other, PyEnvironment)
@@ -172,8 +307,13 @@ class PyEnvironment:
 
     def __eq__(self, other: 'PyEnvironment'):
         assert isinstance(other, PyEnvironment)
+        if addressof(self.environment.contents) == addressof(other.environment.contents):
+            return True
         return libapron.ap_environment_compare(self, other) == 0
 
+    def __hash__(self):
+        return hash(_key(self.environment))
+
     def __ne__(self, other: 'PyEnvironment'):
         assert isinstance(other, PyEnvironment)
         return not self.__eq__(other)
@@ -186,20 +326,88 @@ class PyEnvironment:
         assert isinstance(other, PyEnvironment)
         return libapron.ap_environment_compare(self, other) == 1
 
+    def _lce(self, other: 'PyEnvironment'):
+        """least common environment, with the dimension changes to it from each environment
+
+        Results are cached for the MAX_LCES most recently used pairs of environments. The dimension
+        changes are borrowed from the cache (they must not be freed, and only remain valid until
+        its next use or clear_interned), and are NULL when the corresponding environment is the
+        least common environment; use union (or |) for the least common environment alone.
+        """
+        assert isinstance(other, PyEnvironment)
+        key = (addressof(self.environment.contents), addressof(other.environment.contents))
+        entry = _lces.get(key)
+        if entry is None:
+            d1 = POINTER(DimChange)()
+            d2 = POINTER(DimChange)()
+            environment = libapron.ap_environment_lce(self, other, byref(d1), byref(d2))
+            if not environment:
+                raise ValueError('incompatible environments')
+            # the cache holds references to the environments, so that their addresses stay valid
+            self.environment.contents.count += 1
+            other.environment.contents.count += 1
+            entry = (self.environment, other.environment, _intern(environment), d1, d2)
+            _lces[key] = entry
+            while len(_lces) > max(MAX_LCES, 1):
+                _drop_lce(_lces.popitem(last=False)[1])
+        else:
+            _lces.move_to_end(key)
+        _, _, environment, d1, d2 = entry
+        environment.contents.count += 1
+        return PyEnvironment(environment), d1, d2
+
     def __or__(self, other: 'PyEnvironment') -> 'PyEnvironment':
         assert isinstance(other, PyEnvironment)
-        d1 = DimChange()
-        d2 = DimChange()
-        environment = libapron.ap_environment_lce(self, other, byref(d1), byref(d2))
-        if not environment:
-            raise ValueError('incompatible environments')
-        return PyEnvironment(environment)
+        return self._lce(other)[0]
 
     def union(self, other: 'PyEnvironment') -> 'PyEnvironment':
         assert isinstance(other, PyEnvironment)
         return self.__or__(other)
 
 
+class EnvironmentBuilder:
+    """collector of integer and real variables (without duplicates) for a single environment
+
+    The environment is only allocated (or looked up among the interned ones) once, by build.
+    """
+
+    def __init__(self, environment: PyEnvironment = None):
+        self.int_names: Set[bytes] = set()
+        self.real_names: Set[bytes] = set()
+        if environment is not None:
+            int_names, real_names = _key(environment.environment)
+            self.int_names.update(int_names)
+            self.real_names.update(real_names)
+
+    def __len__(self):
+        return len(self.int_names | self.real_names)
+
+    def __contains__(self, item: PyVar):
+        assert isinstance(item, PyVar)
+        return item._as_parameter_ in self.int_names or item._as_parameter_ in self.real_names
+
+    def add(self, int_vars: Iterable[PyVar] = None, real_vars: Iterable[PyVar] = None):
+        if int_vars is not None:
+            self.int_names.update(x._as_parameter_ for x in int_vars)
+        if real_vars is not None:
+            self.real_names.update(x._as_parameter_ for x in real_vars)
+        return self
+
+    def add_int(self, var: PyVar):
+        self.int_names.add(var._as_parameter_)
+        return self
+
+    def add_real(self, var: PyVar):
+        self.real_names.add(var._as_parameter_)
+        return self
+
+    def build(self) -> PyEnvironment:
+        if not self.int_names.isdisjoint(self.real_names):
+            raise ValueError('clashing variable names')
+        key = (tuple(sorted(self.int_names)), tuple(sorted(self.real_names)))
+        return PyEnvironment(_interned_environment(key))
+
+
 pyvar_p = POINTER(c_char_p)
 libapron.ap_environment_alloc_empty.restype = POINTER(Environment)
 libapron.ap_environment_alloc.argtypes = [pyvar_p, c_size_t, pyvar_p, c_size_t]
@@ -212,8 +420,10 @@ libapron.ap_environment_compare.argtypes = [PyEnvironment, PyEnvironment]
 libapron.ap_environment_dim_of_var.argtypes = [PyEnvironment, PyVar]
 libapron.ap_environment_dim_of_var.restype = Dim
 dimchange_p = POINTER(DimChange)
-libapron.ap_environment_lce.argtypes = [PyEnvironment, PyEnvironment, dimchange_p, dimchange_p]
+dimchange_pp = POINTER(dimchange_p)
+libapron.ap_environment_lce.argtypes = [PyEnvironment, PyEnvironment, dimchange_pp, dimchange_pp]
 libapron.ap_environment_lce.restype = POINTER(Environment)
 dimperm_p = POINTER(DimPerm)
 libapron.ap_environment_rename.argtypes = [PyEnvironment, pyvar_p, pyvar_p, c_size_t, dimperm_p]
 libapron.ap_environment_rename.restype = POINTER(Environment)
+libapron.ap_dimchange_free.argtypes = [dimchange_p]
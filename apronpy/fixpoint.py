@@ -0,0 +1,339 @@
+"""
+Fixpoint Computation
+====================
+
+:Author: Caterina Urban
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union
+
+from apronpy.abstract1 import PyAbstract1
+from apronpy.cache import HashConsTable
+from apronpy.lincons1 import PyLincons1Array
+from apronpy.linexpr1 import PyLinexpr1
+from apronpy.tcons1 import PyTcons1Array
+from apronpy.texpr1 import PyTexpr1
+from apronpy.var import PyVar
+
+Transfer = Callable[[PyAbstract1], PyAbstract1]
+
+
+class Assign:
+    """transfer function assigning (a list of) expression(s) to (a list of) variable(s)"""
+
+    def __init__(self, var_or_vars: Union[PyVar, List[PyVar]],
+                 expr_or_exprs: Union[PyLinexpr1, PyTexpr1, List[PyLinexpr1], List[PyTexpr1]]):
+        self.var_or_vars = var_or_vars
+        self.expr_or_exprs = expr_or_exprs
+
+    def __call__(self, state: PyAbstract1) -> PyAbstract1:
+        return state.assign(self.var_or_vars, self.expr_or_exprs)
+
+    def __repr__(self):
+        return '{} := {}'.format(self.var_or_vars, self.expr_or_exprs)
+
+
+class Meet:
+    """transfer function restricting to (an array of) constraints"""
+
+    def __init__(self, constraints: Union[PyLincons1Array, PyTcons1Array]):
+        self.constraints = constraints
+
+    def __call__(self, state: PyAbstract1) -> PyAbstract1:
+        return state.meet(self.constraints)
+
+    def __repr__(self):
+        return '{}?'.format(self.constraints)
+
+
+class Forget:
+    """transfer function forgetting (i.e., havocking) variables"""
+
+    def __init__(self, variables: List[PyVar]):
+        self.variables = variables
+
+    def __call__(self, state: PyAbstract1) -> PyAbstract1:
+        return state.forget(self.variables)
+
+    def __repr__(self):
+        return 'forget({})'.format(', '.join(str(variable) for variable in self.variables))
+
+
+class Component:
+    """component of a weak topological ordering: a head followed by nested elements"""
+
+    def __init__(self, head: Hashable, elements: List[Union[Hashable, 'Component']]):
+        self.head = head
+        self.elements = elements
+
+    def __repr__(self):
+        return '({})'.format(' '.join(str(x) for x in [self.head] + self.elements))
+
+    def nodes(self):
+        yield self.head
+        for element in self.elements:
+            if isinstance(element, Component):
+                yield from element.nodes()
+            else:
+                yield element
+
+
+class ControlFlowGraph:
+    """graph of program points with edges labelled by transfer functions (None is the identity)"""
+
+    def __init__(self):
+        self.successors: Dict[Hashable, List[Hashable]] = dict()
+        self.predecessors: Dict[Hashable, List[Hashable]] = dict()
+        self.edges: Dict[tuple, Optional[Transfer]] = dict()
+        self.version = 0
+
+    def add_node(self, node: Hashable):
+        if node not in self.successors:
+            self.successors[node] = list()
+            self.predecessors[node] = list()
+            self.version += 1
+        return self
+
+    def add_edge(self, source: Hashable, target: Hashable, transfer: Transfer = None):
+        self.add_node(source)
+        self.add_node(target)
+        if (source, target) not in self.edges:
+            self.successors[source].append(target)
+            self.predecessors[target].append(source)
+            self.version += 1
+        self.edges[(source, target)] = transfer
+        return self
+
+    def reachable(self, node: Hashable) -> Set[Hashable]:
+        visited = {node}
+        worklist = [node]
+        while worklist:
+            current = worklist.pop()
+            for successor in self.successors[current]:
+                if successor not in visited:
+                    visited.add(successor)
+                    worklist.append(successor)
+        return visited
+
+    def wto(self, entry: Hashable) -> List[Union[Hashable, Component]]:
+        """Bourdoncle's weak topological ordering of the nodes reachable from the entry
+
+        The recursive formulation of the algorithm is unrolled on an explicit stack of frames,
+        so that long control flow graphs do not exceed the Python recursion limit.
+        """
+        inf = float('inf')
+        dfn: Dict[Hashable, float] = dict()
+        stack = list()
+        frames = list()
+        num = 0
+
+        def visit(v, partition):
+            nonlocal num
+            stack.append(v)
+            num += 1
+            dfn[v] = num
+            frames.append([True, v, partition, iter(self.successors[v]), num, False])
+
+        result = list()
+        visit(entry, result)
+        returned = None
+        while frames:
+            frame = frames[-1]
+            if frame[0]:    # visit(v, partition)
+                _, v, partition, successors, head, loop = frame
+                if returned is not None:
+                    if returned <= head:
+                        head, loop = returned, True
+                    returned = None
+                pushed = False
+                for w in successors:
+                    if dfn.get(w, 0) == 0:
+                        frame[4], frame[5] = head, loop
+                        visit(w, partition)
+                        pushed = True
+                        break
+                    if dfn[w] <= head:
+                        head, loop = dfn[w], True
+                if pushed:
+                    continue
+                frames.pop()
+                if head == dfn[v]:
+                    dfn[v] = inf
+                    element = stack.pop()
+                    if loop:
+                        while element != v:
+                            dfn[element] = 0
+                            element = stack.pop()
+                        frames.append([False, v, partition, iter(self.successors[v]), head, list()])
+                        continue
+                    partition.append(v)
+                returned = head
+            else:           # component(v, partition)
+                _, v, partition, successors, head, elements = frame
+                returned = None
+                pushed = False
+                for w in successors:
+                    if dfn.get(w, 0) == 0:
+                        visit(w, elements)
+                        pushed = True
+                        break
+                if pushed:
+                    continue
+                frames.pop()
+                elements.reverse()
+                partition.append(Component(v, elements))
+                returned = head
+        result.reverse()
+        return result
+
+
+class FixpointSolver:
+    """recursive iteration strategy over the weak topological ordering of a control flow graph
+
+    Widening is applied at the heads of the components (after delay iterations, and up to the
+    given thresholds, if any), and is followed by the given number of descending iterations
+    that use narrowing at the heads of the components. If a hash-consing table is given, equal
+    abstract values reached along different paths share a single object. If a policy is given
+    (e.g., PyAbstract1.minimize), it is applied in place to the values stored at the heads.
+    """
+
+    def __init__(self, cfg: ControlFlowGraph, entry: Hashable, initial: PyAbstract1,
+                 delay: int = 1, thresholds: PyLincons1Array = None, narrowing: int = 1,
+                 table: HashConsTable = None, policy: Callable[[PyAbstract1], object] = None):
+        self.cfg = cfg
+        self.entry = entry
+        self.initial = initial
+        self.delay = delay
+        self.thresholds = thresholds
+        self.narrowing = narrowing
+        self.table = table
+        self.policy = policy
+        self.values: Dict[Hashable, PyAbstract1] = dict()
+        self.iterations = 0
+        self._wto = None
+        self._version = None
+
+    @property
+    def wto(self) -> List[Union[Hashable, Component]]:
+        if self._version != self.cfg.version:
+            self._wto = self.cfg.wto(self.entry)
+            self._version = self.cfg.version
+        return self._wto
+
+    @property
+    def widening_points(self) -> Set[Hashable]:
+        heads = set()
+        elements = list(self.wto)
+        while elements:
+            element = elements.pop()
+            if isinstance(element, Component):
+                heads.add(element.head)
+                elements.extend(element.elements)
+        return heads
+
+    def _incoming(self, node: Hashable) -> Optional[PyAbstract1]:
+        states = [self.initial] if node == self.entry else list()
+        for predecessor in self.cfg.predecessors[node]:
+            state = self.values.get(predecessor)
+            if state is None or state.is_bottom():
+                continue
+            transfer = self.cfg.edges[(predecessor, node)]
+            states.append(transfer(state) if transfer else state)
+        if not states:
+            return None
+        result = states[0] if len(states) == 1 else type(states[0]).join_all(states)
+        return self.table.intern(result) if self.table is not None else result
+
+    def _ascend(self, elements: List[Union[Hashable, Component]], nodes: Set[Hashable] = None):
+        for element in elements:
+            if isinstance(element, Component):
+                if nodes is None or element.head in nodes:
+                    self._stabilize(element)
+            elif nodes is None or element in nodes:
+                self.iterations += 1
+                self.values[element] = self._incoming(element)
+
+    def _stabilize(self, component: Component):
+        head = component.head
+        iteration = 0
+        while True:
+            self.iterations += 1
+            incoming = self._incoming(head)
+            previous = self.values.get(head)
+            if incoming is None:
+                if iteration > 0 or previous is None:
+                    break
+            elif previous is None:
+                self.values[head] = incoming
+            elif iteration > 0 and (incoming is previous or incoming.is_leq(previous)):
+                break
+            else:
+                current = previous.join(incoming)
+                if iteration >= self.delay:
+                    if self.thresholds:
+                        current = previous.widening_threshold(current, self.thresholds)
+                    else:
+                        current = previous.widening(current)
+                if self.policy is not None:
+                    self.policy(current)
+                self.values[head] = current
+            self._ascend(component.elements)
+            iteration += 1
+
+    def _descend(self, elements: List[Union[Hashable, Component]], nodes: Set[Hashable] = None):
+        for element in elements:
+            if isinstance(element, Component):
+                if nodes is None or element.head in nodes:
+                    self.iterations += 1
+                    incoming = self._incoming(element.head)
+                    previous = self.values.get(element.head)
+                    if incoming is None or previous is None:
+                        self.values[element.head] = incoming
+                    else:
+                        current = previous.narrowing(incoming)
+                        if self.policy is not None:
+                            self.policy(current)
+                        self.values[element.head] = current
+                    self._descend(element.elements)
+            elif nodes is None or element in nodes:
+                self.iterations += 1
+                self.values[element] = self._incoming(element)
+
+    def _solve(self, nodes: Set[Hashable] = None) -> Dict[Hashable, PyAbstract1]:
+        self._ascend(self.wto, nodes)
+        for _ in range(self.narrowing):
+            self._descend(self.wto, nodes)
+        return self.values
+
+    def solve(self) -> Dict[Hashable, PyAbstract1]:
+        self.values = dict()
+        return self._solve()
+
+    def update_edge(self, source: Hashable, target: Hashable,
+                    transfer: Transfer = None) -> Dict[Hashable, PyAbstract1]:
+        """re-stabilize after (re)labelling an edge, only recomputing the nodes it can affect"""
+        self.cfg.add_edge(source, target, transfer)
+        nodes = self.cfg.reachable(target)
+        for node in nodes:
+            self.values.pop(node, None)
+        return self._solve(nodes)
+
+
+def _solve(builder: Callable[..., FixpointSolver], args: tuple) -> Dict[Hashable, PyAbstract1]:
+    """solve the fixpoint built by the given builder (in a worker process)"""
+    return {node: value for node, value in builder(*args).solve().items() if value is not None}
+
+
+def solve_parallel(tasks: Iterable[Tuple[Callable[..., FixpointSolver], tuple]],
+                   max_workers: int = None) -> List[Dict[Hashable, PyAbstract1]]:
+    """solve independent fixpoints (e.g., of different procedures) on a process pool
+
+    Each task is a pair of a picklable (i.e., module-level) builder and its (picklable) arguments;
+    the builder is called in a worker process to create the control flow graph, the initial
+    abstract value, and the corresponding solver. The abstract values of the solution are pickled
+    back in their serialized form, with the managers registered under the same names in the caller
+    (see PyManager.register), if any.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_solve, builder, tuple(args)) for builder, args in tasks]
+        return [future.result() for future in futures]
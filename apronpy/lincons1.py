@@ -7,7 +7,8 @@ APRON Linear Constraints (Level 1)
 from _ctypes import Structure, POINTER, byref
 from copy import deepcopy
 from ctypes import c_char_p, c_size_t
-from typing import List, Union
+from numbers import Number
+from typing import List, Sequence, Union
 
 from apronpy.cdll import libapron
 from apronpy.coeff import PyDoubleScalarCoeff, CoeffDiscr, PyMPQIntervalCoeff, \
@@ -235,6 +236,86 @@ class PyLincons1Array:
         else:
             self.lincons1array = libapron.ap_lincons1_array_make(environment, 0)
 
+    # noinspection PyTypeChecker
+    @classmethod
+    def from_matrix(cls, environment: PyEnvironment, A, b: Sequence[Number],
+                    constyp: Union[ConsTyp, Sequence[ConsTyp]] = ConsTyp.AP_CONS_SUPEQ):
+        """array of the constraints b - A·x constyp 0 (by default, A·x <= b)
+
+        The columns of A correspond to the dimensions of the environment; A is either dense
+        (e.g., a NumPy array or a list of lists) or sparse (e.g., a SciPy CSR matrix, whose
+        duplicate entries are summed).
+        """
+        if hasattr(A, 'tocsr'):
+            A = A.tocsr().copy()
+            A.sum_duplicates()
+            indptr, indices, data = A.indptr.tolist(), A.indices.tolist(), A.data.tolist()
+            rows = [sorted(zip(indices[indptr[i]:indptr[i+1]], data[indptr[i]:indptr[i+1]]))
+                    for i in range(len(indptr) - 1)]
+        else:
+            A = A.tolist() if hasattr(A, 'tolist') else A
+            rows = [list(enumerate(row)) for row in A]
+        b = b.tolist() if hasattr(b, 'tolist') else b
+        assert len(rows) == len(b)
+        size = len(rows)
+        constyps = [constyp] * size if isinstance(constyp, int) else list(constyp)
+        assert len(constyps) == size
+        result = cls(libapron.ap_lincons1_array_make(environment.environment, size))
+        dimensions = len(environment)
+        for i, row in enumerate(rows):
+            terms = [(dim, value) for dim, value in row if value != 0]
+            assert all(0 <= dim < dimensions for dim, _ in terms)
+            linexpr0 = libapron.ap_linexpr0_alloc(LinexprDiscr.AP_LINEXPR_SPARSE, len(terms))
+            linexpr0.contents.set_terms([(dim, -value) for dim, value in terms], b[i])
+            lincons0 = result.lincons1array.lincons0_array.p[i]
+            lincons0.linexpr0 = linexpr0
+            lincons0.constyp = c_uint(constyps[i])
+        return result
+
+    def to_matrix(self, sparse: bool = True, exact: bool = False):
+        """the matrix A, the vector b, and the constraint types of the constraints
+        b - A·x constyp 0
+
+        The columns of A correspond to the dimensions of the environment; A is a SciPy CSR matrix
+        if sparse, and a (dense) NumPy array otherwise. The coefficients are rounded to floats
+        or, if exact, are Fractions (in dense NumPy arrays of objects). Congruence constraints
+        cannot be represented, and raise a ValueError.
+        """
+        assert not (sparse and exact)
+        import numpy
+        number = Coeff.fraction if exact else float
+        array = self.lincons1array.lincons0_array
+        env = self.lincons1array.env.contents
+        dimensions = env.intdim + env.realdim
+        data, indices, indptr, b, constyps = list(), list(), [0], list(), list()
+        for i in range(array.size):
+            lincons0 = array.p[i]
+            if lincons0.constyp == ConsTyp.AP_CONS_EQMOD:
+                raise ValueError('congruence constraints cannot be exported')
+            linexpr0 = lincons0.linexpr0.contents
+            if linexpr0.discr == LinexprDiscr.AP_LINEXPR_DENSE:
+                terms = [(j, linexpr0.p.coeff[j]) for j in range(linexpr0.size)]
+            else:  # linexpr0.discr == LinexprDiscr.AP_LINEXPR_SPARSE
+                linterms = [linexpr0.p.linterm[j] for j in range(linexpr0.size)]
+                terms = [(linterm.dim.value, linterm.coeff) for linterm in linterms]
+            for dim, coeff in terms:
+                value = -number(coeff) if dim < dimensions else 0
+                if value:
+                    data.append(value)
+                    indices.append(dim)
+            indptr.append(len(data))
+            b.append(number(linexpr0.cst))
+            constyps.append(ConsTyp(lincons0.constyp))
+        dtype = object if exact else float
+        if sparse:
+            from scipy.sparse import csr_matrix
+            A = csr_matrix((data, indices, indptr), shape=(array.size, dimensions))
+        else:
+            A = numpy.zeros((array.size, dimensions), dtype=dtype)
+            for i in range(array.size):
+                A[i, indices[indptr[i]:indptr[i+1]]] = data[indptr[i]:indptr[i+1]]
+        return A, numpy.array(b, dtype=dtype), constyps
+
     def __del__(self):
         libapron.ap_lincons1_array_clear(self)
         del self.lincons1array
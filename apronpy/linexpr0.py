@@ -4,12 +4,14 @@ APRON Linear Expressions (Level 0)
 
 :Author: Caterina Urban
 """
-from _ctypes import Structure, Union, POINTER
+from _ctypes import Structure, Union, POINTER, byref
 from ctypes import c_uint, c_size_t, c_bool
 from enum import IntEnum
+from numbers import Number
+from typing import List, Tuple
 
 from apronpy.cdll import libapron
-from apronpy.coeff import Coeff
+from apronpy.coeff import Coeff, set_number
 from apronpy.dimension import Dim
 
 
@@ -74,7 +76,20 @@ class Linexpr0(Structure):
         ('p', P)
     ]
 
+    def set_terms(self, terms: List[Tuple[int, Number]], cst: Number = 0):
+        """set the terms (sorted by dimension) and the constant of a sparse linear expression"""
+        assert self.discr == LinexprDiscr.AP_LINEXPR_SPARSE and len(terms) <= self.size
+        for k, (dim, value) in enumerate(terms):
+            linterm = self.p.linterm[k]
+            linterm.dim = dim
+            set_number(byref(linterm.coeff), value)
+        set_number(byref(self.cst), cst)
 
+
+libapron.ap_linexpr0_alloc.argtypes = [c_uint, c_size_t]
+libapron.ap_linexpr0_alloc.restype = POINTER(Linexpr0)
+libapron.ap_linexpr0_coeffref.argtypes = [POINTER(Linexpr0), c_uint]
+libapron.ap_linexpr0_coeffref.restype = POINTER(Coeff)
 libapron.ap_linexpr0_minimize.argtypes = [POINTER(Linexpr0)]
 libapron.ap_linexpr0_copy.argtypes = [POINTER(Linexpr0)]
 libapron.ap_linexpr0_copy.restype = POINTER(Linexpr0)
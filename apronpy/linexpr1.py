@@ -7,6 +7,9 @@ APRON Linear Expressions (Level 1)
 from _ctypes import Structure, POINTER, byref
 from copy import deepcopy
 from ctypes import c_uint, c_size_t, c_char_p
+from numbers import Number
+from operator import itemgetter
+from typing import Dict, Sequence
 
 from apronpy.cdll import libapron
 from apronpy.coeff import Coeff, CoeffDiscr, PyDoubleIntervalCoeff, PyDoubleScalarCoeff, \
@@ -70,6 +73,32 @@ class PyLinexpr1:
             size = len(linexpr1_or_environment)
             self.linexpr1 = libapron.ap_linexpr1_make(linexpr1_or_environment, discr, size)
 
+    @classmethod
+    def from_dims(cls, environment: PyEnvironment, dims: Sequence[int],
+                  coeffs: Sequence[Number], cst: Number = 0):
+        """sparse linear expression with the given coefficients for the given dimensions
+
+        Coefficients are Python numbers: floats become doubles, integers and fractions are exact.
+        """
+        dims = dims.tolist() if hasattr(dims, 'tolist') else dims
+        coeffs = coeffs.tolist() if hasattr(coeffs, 'tolist') else coeffs
+        assert len(dims) == len(coeffs)
+        terms = sorted(((dim, coeff) for dim, coeff in zip(dims, coeffs) if coeff != 0),
+                       key=itemgetter(0))
+        size = len(environment)
+        assert all(0 <= dim < size for dim, _ in terms)
+        assert all(terms[k][0] < terms[k+1][0] for k in range(len(terms) - 1))
+        discr = LinexprDiscr.AP_LINEXPR_SPARSE
+        linexpr1 = libapron.ap_linexpr1_make(environment, discr, len(terms))
+        linexpr1.linexpr0.contents.set_terms(terms, cst)
+        return cls(linexpr1)
+
+    @classmethod
+    def from_dict(cls, environment: PyEnvironment, coeffs: Dict[PyVar, Number], cst: Number = 0):
+        """sparse linear expression with the given coefficients for the given variables"""
+        dims = [environment.dim_of(var) for var in coeffs]
+        return cls.from_dims(environment, dims, list(coeffs.values()), cst)
+
     def __deepcopy__(self, memodict=None):
         if memodict is None:
             memodict = {}
@@ -158,6 +187,13 @@ class PyLinexpr1:
     def set_coeff(self, var: PyVar, coeff: PyCoeff):
         libapron.ap_coeff_set(libapron.ap_linexpr1_coeffref(self, var._as_parameter_), coeff.coeff)
 
+    def set_coeff_dim(self, dim: int, coeff: PyCoeff):
+        """set the coefficient of the variable with the given dimension in the environment"""
+        env = self.linexpr1.env.contents
+        assert 0 <= dim < env.intdim + env.realdim
+        coeffref = libapron.ap_linexpr0_coeffref(self.linexpr1.linexpr0, dim)
+        libapron.ap_coeff_set(coeffref, coeff.coeff)
+
 
 libapron.ap_linexpr1_make.argtypes = [PyEnvironment, c_uint, c_size_t]
 libapron.ap_linexpr1_make.restype = Linexpr1
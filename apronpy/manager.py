@@ -5,8 +5,11 @@ APRON Manager
 """
 from _ctypes import Structure, POINTER
 from abc import ABCMeta
+from contextlib import contextmanager
 from ctypes import c_char_p, c_void_p, CFUNCTYPE, c_size_t, c_int, c_bool, c_uint
 from enum import IntEnum
+from typing import Callable, Dict, Iterable, Optional, Type, Union
+from weakref import ref, WeakValueDictionary
 
 from apronpy.cdll import libapron
 
@@ -187,6 +190,20 @@ class Result(Structure):
     ]
 
 
+class MemBuf(Structure):
+    """
+    typedef struct ap_membuf_t {
+      void* ptr;
+      size_t size;
+    } ap_membuf_t;
+    """
+
+    _fields_ = [
+        ('ptr', c_void_p),
+        ('size', c_size_t)
+    ]
+
+
 class FunOpt(Structure):
     """
     typedef struct ap_funopt_t {
@@ -240,6 +257,51 @@ class Option(Structure):
     ]
 
 
+class ApronError(Exception):
+    """exception raised by a function of an APRON domain"""
+
+    def __init__(self, exn: Exc, funid: FunId = FunId.AP_FUNID_UNKNOWN, msg: str = ''):
+        super().__init__('{} in {}: {}'.format(exn.name, funid.name, msg))
+        self.exn = exn
+        self.funid = funid
+        self.msg = msg
+
+
+class ApronTimeout(ApronError):
+    pass
+
+
+class ApronOutOfSpace(ApronError):
+    pass
+
+
+class ApronOverflow(ApronError):
+    pass
+
+
+ApronErrors = {
+    Exc.AP_EXC_TIMEOUT: ApronTimeout,
+    Exc.AP_EXC_OUT_OF_SPACE: ApronOutOfSpace,
+    Exc.AP_EXC_OVERFLOW: ApronOverflow
+}
+
+
+_registry: 'WeakValueDictionary[str, PyManager]' = WeakValueDictionary()
+
+
+def _unpickle(cls: Type['PyManager'], name: Optional[str], option: bytes, on_exception: str):
+    """the manager registered under the given name, or a new manager with the given options"""
+    manager = _registry.get(name) if name is not None else None
+    if type(manager) is cls:
+        return manager
+    manager = cls()
+    manager.manager.contents.option = Option.from_buffer_copy(option)
+    manager.on_exception = on_exception
+    if name is not None and name not in _registry:
+        manager.register(name)
+    return manager
+
+
 # noinspection PyTypeChecker
 class Manager(Structure):
     """
@@ -274,11 +336,148 @@ class PyManager(metaclass=ABCMeta):
 
     def __init__(self, manager: POINTER(Manager)):
         self.manager = manager
+        self.transfer_cache = None
+        self.tracker = None
+        self.name: Optional[str] = None
+        self.on_exception = 'ignore'
+        self.exceptions: Dict[Exc, int] = {exn: 0 for exn in Exc if exn != Exc.AP_EXC_SIZE}
 
     def __del__(self):
         libapron.ap_manager_free(self)
         del self.manager
 
+    def _try_call(self, function, *args):
+        """call a function that the domain might not implement, without aborting if it does not"""
+        man = self.manager.contents
+        abort = man.option.abort_if_exception[Exc.AP_EXC_NOT_IMPLEMENTED]
+        man.option.abort_if_exception[Exc.AP_EXC_NOT_IMPLEMENTED] = False
+        man.result.exn = Exc.AP_EXC_NONE
+        try:
+            result = function(*args)
+        finally:
+            man.option.abort_if_exception[Exc.AP_EXC_NOT_IMPLEMENTED] = abort
+        if man.result.exn == Exc.AP_EXC_NOT_IMPLEMENTED:
+            man.result.exn = Exc.AP_EXC_NONE
+            raise NotImplementedError('not implemented by {}'.format(man.library.decode()))
+        return result
+
+    def get_option(self, funid: FunId) -> Dict[str, Union[int, bool]]:
+        assert funid < FunId.AP_FUNID_SIZE
+        funopt = self.manager.contents.option.funopt[funid]
+        return {name: getattr(funopt, name) for name, _ in FunOpt._fields_}
+
+    def set_option(self, funid: FunId, algorithm: int = None, timeout: int = None,
+                   max_object_size: int = None, flag_exact_wanted: bool = None,
+                   flag_best_wanted: bool = None):
+        """set the options of a function of the domain (the options left to None are unchanged)
+
+        The algorithm 0 is the default one of the domain, larger values select more accurate
+        algorithms and smaller values more efficient ones; the timeout and the maximum object size
+        (in the unit of the domain) make the function abort with an exception, if supported.
+        """
+        assert funid < FunId.AP_FUNID_SIZE
+        funopt = self.manager.contents.option.funopt[funid]
+        options = {
+            'algorithm': algorithm,
+            'timeout': timeout,
+            'max_object_size': max_object_size,
+            'flag_exact_wanted': flag_exact_wanted,
+            'flag_best_wanted': flag_best_wanted
+        }
+        for name, value in options.items():
+            if value is not None:
+                setattr(funopt, name, value)
+        return self
+
+    @contextmanager
+    def options(self, funid_or_funids: Union[FunId, Iterable[FunId]], **options):
+        """temporarily set the options of (a list of) function(s), see set_option"""
+        funids = [funid_or_funids] if isinstance(funid_or_funids, int) else list(funid_or_funids)
+        previous = {funid: self.get_option(funid) for funid in funids}
+        for funid in funids:
+            self.set_option(funid, **options)
+        try:
+            yield self
+        finally:
+            for funid, option in previous.items():
+                self.set_option(funid, **option)
+
+    @property
+    def flag_exact(self) -> bool:
+        """whether the result of the last function is (known to be) mathematically exact"""
+        return self.manager.contents.result.flag_exact
+
+    @property
+    def flag_best(self) -> bool:
+        """whether the result of the last function is (known to be) the best approximation"""
+        return self.manager.contents.result.flag_best
+
+    def abort_if_exception(self, exn: Exc, abort: bool = True):
+        self.manager.contents.option.abort_if_exception[exn] = abort
+        return self
+
+    def handle_exceptions(self, mode: str = 'raise'):
+        """ignore the exceptions of the domain, raise them as ApronError, or only count them
+
+        Raising or counting exceptions disables aborting on timeouts, out of space, and overflows.
+        """
+        assert mode in ('ignore', 'raise', 'count')
+        self.on_exception = mode
+        if mode != 'ignore':
+            for exn in ApronErrors:
+                self.abort_if_exception(exn, False)
+        return self
+
+    @contextmanager
+    def handling_exceptions(self, mode: str = 'raise'):
+        """temporarily handle the exceptions of the domain as given, see handle_exceptions"""
+        on_exception = self.on_exception
+        aborts = {exn: self.manager.contents.option.abort_if_exception[exn] for exn in ApronErrors}
+        self.handle_exceptions(mode)
+        try:
+            yield self
+        finally:
+            self.on_exception = on_exception
+            for exn, abort in aborts.items():
+                self.abort_if_exception(exn, abort)
+
+    def check(self):
+        """check (and reset) the exception of the last function, according to handle_exceptions"""
+        if self.on_exception == 'ignore':
+            return
+        man = self.manager.contents
+        exn = Exc(man.result.exn)
+        if exn == Exc.AP_EXC_NONE:
+            return
+        funid, msg = FunId.AP_FUNID_UNKNOWN, ''
+        if man.result.exclog:
+            exclog = man.result.exclog.contents
+            funid, msg = FunId(exclog.funid), (exclog.msg or b'').decode()
+        man.result.exn = Exc.AP_EXC_NONE
+        libapron.ap_manager_clear_exclog(self)
+        self.exceptions[exn] += 1
+        if self.on_exception == 'raise':
+            raise ApronErrors.get(exn, ApronError)(exn, funid, msg)
+
+    def register(self, name: str):
+        """register the manager under the given name, so that unpickling resolves to it"""
+        _registry[name] = self
+        self.name = name
+        return self
+
+    def __reduce__(self):
+        """pickle the type, the name (if registered), the options, and the exception handling
+
+        Unpickling yields the manager registered under the same name in the unpickling process,
+        if any, and a new manager with the same options otherwise (so that, e.g., the abstract
+        values returned by solve_parallel share a registered manager of the caller). The transfer
+        cache and the memory tracker of the manager are not pickled.
+        """
+        if type(self) is PyManager:
+            raise TypeError('only the managers of specific domains can be pickled')
+        option = bytes(self.manager.contents.option)
+        return _unpickle, (type(self), self.name, option, self.on_exception)
+
     @property
     def _as_parameter_(self):
         return self.manager
@@ -289,5 +488,73 @@ class PyManager(metaclass=ABCMeta):
         return argument
 
 
+class MemoryTracker:
+    """tracker of the live abstract values of a manager and of their total size
+
+    Sizes are in the unit of the domain and are measured when values are created or modified
+    in place. Once the total size exceeds the (soft) limit, the policy either raises ApronOutOfSpace
+    or is a function shrinking a value in place, which is applied to the largest live values until
+    the total size is within the limit again.
+    """
+
+    def __init__(self, manager: PyManager, limit: int = None,
+                 policy: Union[str, Callable] = 'raise'):
+        assert policy == 'raise' or callable(policy)
+        self.manager = manager
+        self.limit = limit
+        self.policy = policy
+        self.values: Dict[int, ref] = dict()
+        self.sizes: Dict[int, int] = dict()
+        self.size = 0
+        self.peak = 0
+        self._enforcing = False     # the policy may track the values it shrinks
+        manager.tracker = self
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def detach(self):
+        if self.manager.tracker is self:
+            self.manager.tracker = None
+        self.values.clear()
+        self.sizes.clear()
+        self.size = 0
+
+    def track(self, value):
+        key = id(value)
+        size = value.size()
+        self.size += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+        self.values[key] = ref(value)
+        self.peak = max(self.peak, self.size)
+        if self.limit is not None and self.size > self.limit and not self._enforcing:
+            self._enforce()
+
+    def release(self, value):
+        key = id(value)
+        self.size -= self.sizes.pop(key, 0)
+        self.values.pop(key, None)
+
+    def _enforce(self):
+        if self.policy == 'raise':
+            msg = 'total size {} exceeds the limit {}'.format(self.size, self.limit)
+            raise ApronOutOfSpace(Exc.AP_EXC_OUT_OF_SPACE, FunId.AP_FUNID_ASIZE, msg)
+        self._enforcing = True
+        try:
+            for key in sorted(self.sizes, key=self.sizes.get, reverse=True):
+                value = self.values[key]()
+                if value is None:
+                    continue
+                self.policy(value)
+                size = value.size()
+                self.size += size - self.sizes.get(key, 0)
+                self.sizes[key] = size
+                if self.size <= self.limit:
+                    break
+        finally:
+            self._enforcing = False
+
+
 libapron.ap_manager_free.argtypes = [POINTER(Manager)]
+libapron.ap_manager_clear_exclog.argtypes = [POINTER(Manager)]
 
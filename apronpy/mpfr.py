@@ -10,6 +10,7 @@ from enum import IntEnum
 from typing import Union
 
 from apronpy.cdll import libmpfr
+from apronpy.mpq import PyMPQ
 
 
 # initialization and assignment functions
@@ -19,6 +20,7 @@ MPFR_set = libmpfr.mpfr_set
 MPFR_set_d = libmpfr.mpfr_set_d
 # conversion functions
 MPFR_get_d = libmpfr.mpfr_get_d
+MPFR_get_q = libmpfr.mpfr_get_q
 # comparison functions
 MPFR_cmp = libmpfr.mpfr_cmp  # -1: op1 < op2, 0: op1 == op2, 1: op1 > op2
 # arithmetic functions
@@ -167,6 +169,7 @@ MPFR_set_d.argtypes = [PyMPFR, c_double, c_int]
 # conversion functions
 MPFR_get_d.argtypes = [POINTER(MPFR), c_int]
 MPFR_get_d.restype = c_double
+MPFR_get_q.argtypes = [PyMPQ, POINTER(MPFR)]
 # comparison functions
 MPFR_cmp.argtypes = [PyMPFR, PyMPFR]
 # arithmetic functions
@@ -0,0 +1,229 @@
+"""
+Profiling of APRON Functions
+============================
+
+:Author: Caterina Urban
+"""
+import json
+import sys
+from ctypes import c_size_t, POINTER
+from math import floor, log2
+from time import perf_counter
+from typing import Dict, Union
+
+from apronpy.abstract0 import Abstract0
+from apronpy.abstract1 import Abstract1
+from apronpy.cdll import libapron
+from apronpy.manager import FunId, PyManager
+
+APRON_size = libapron.ap_abstract0_size
+APRON_size.argtypes = [PyManager, POINTER(Abstract0)]
+APRON_size.restype = c_size_t
+
+_funids = {
+    'clear': FunId.AP_FUNID_FREE,
+    'size': FunId.AP_FUNID_ASIZE,
+    'bound_variable': FunId.AP_FUNID_BOUND_DIMENSION,
+    'widening_threshold': FunId.AP_FUNID_WIDENING
+}
+
+
+def funid_of(name: str) -> Union[FunId, str]:
+    """function identifier of a function of the library (or its name, if it has none)"""
+    for prefix in ('ap_abstract1_', 'ap_abstract0_'):
+        if name.startswith(prefix):
+            operation = name[len(prefix):]
+            if operation in _funids:
+                return _funids[operation]
+            for suffix in ('', '_array'):
+                funid = 'AP_FUNID_{}{}'.format(operation, suffix).upper()
+                if funid in FunId.__members__:
+                    return FunId[funid]
+    return name
+
+
+class Histogram:
+    """histogram of (positive) durations, with buckets growing by a factor of 2^(1/resolution)"""
+
+    def __init__(self, resolution: int = 8):
+        self.resolution = resolution
+        self.buckets: Dict[int, int] = dict()
+        self.count = 0
+
+    def add(self, duration: float):
+        bucket = floor(log2(max(duration, 1e-9)) * self.resolution)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+
+    def percentile(self, percentage: float) -> float:
+        """upper bound of the bucket containing the given percentile"""
+        assert 0 <= percentage <= 100
+        rank = percentage * self.count / 100
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return 2 ** ((bucket + 1) / self.resolution)
+        return 0.0
+
+
+class Statistics:
+    """call count, cumulative time, latency histogram, and result sizes of a function"""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.histogram = Histogram()
+        self.sizes = 0
+        self.size = 0
+        self.max_size = 0
+
+    def add(self, duration: float, size: int = None):
+        self.count += 1
+        self.time += duration
+        self.histogram.add(duration)
+        if size is not None:
+            self.sizes += 1
+            self.size += size
+            self.max_size = max(self.max_size, size)
+
+    def report(self):
+        report = {
+            'count': self.count,
+            'time': self.time,
+            'p50': self.histogram.percentile(50),
+            'p99': self.histogram.percentile(99)
+        }
+        if self.sizes:
+            report['mean_size'] = self.size / self.sizes
+            report['max_size'] = self.max_size
+        return report
+
+
+def _size(manager: PyManager, abstract0: POINTER(Abstract0)) -> int:
+    """size of an abstract value, leaving the result (e.g., the flags) of the manager unchanged"""
+    result = manager.manager.contents.result
+    exn, exact, best = result.exn, result.flag_exact, result.flag_best
+    size = APRON_size(manager, abstract0)
+    result.exn, result.flag_exact, result.flag_best = exn, exact, best
+    return size
+
+
+class _Timed:
+    """timing wrapper of a function of the library, forwarding its attributes (e.g., argtypes)"""
+
+    def __init__(self, function, statistics: Statistics):
+        object.__setattr__(self, 'function', function)
+        object.__setattr__(self, 'statistics', statistics)
+
+    def __getattr__(self, name):
+        return getattr(self.function, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.function, name, value)
+
+    def __call__(self, *args):
+        function = self.function
+        start = perf_counter()
+        result = function(*args)
+        duration = perf_counter() - start
+        sized = function.restype in (Abstract1, POINTER(Abstract0))
+        if sized and args and isinstance(args[0], PyManager):
+            abstract0 = result.abstract0 if function.restype is Abstract1 else result
+            self.statistics.add(duration, _size(args[0], abstract0) if abstract0 else None)
+        else:
+            self.statistics.add(duration)
+        return result
+
+
+class Profiler:
+    """profiler of the calls to the functions of the library, grouped by function identifier
+
+    While enabled, the functions of the library (its attributes, the functions obtained by
+    indexing it, and their aliases in the apronpy modules) are replaced by timing wrappers, which
+    also record the size of the abstract values they return; once disabled, the original functions
+    are restored, so that profiling costs nothing.
+    """
+
+    def __init__(self):
+        self.statistics: Dict[Union[FunId, str], Statistics] = dict()
+        self._originals = dict()
+        self._aliases = list()
+        self._class = None
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+    def _wrap(self, function) -> _Timed:
+        statistics = self.statistics.setdefault(funid_of(function.__name__), Statistics())
+        return _Timed(function, statistics)
+
+    def enable(self):
+        if self.enabled:
+            return self
+        functions = [(name, function) for name, function in vars(libapron).items()
+                     if isinstance(function, libapron._FuncPtr) and function is not APRON_size]
+        wrappers = dict()
+        for name, function in functions:
+            wrappers[id(function)] = self._wrap(function)
+            self._originals[name] = function
+            setattr(libapron, name, wrappers[id(function)])
+        for module in list(sys.modules.values()):
+            if module is None or not module.__name__.startswith('apronpy.'):
+                continue
+            for name, value in list(vars(module).items()):
+                if not isinstance(value, libapron._FuncPtr) or value is APRON_size:
+                    continue
+                if id(value) not in wrappers:   # e.g., obtained by indexing the library
+                    wrappers[id(value)] = self._wrap(value)
+                self._aliases.append((module, name, value))
+                setattr(module, name, wrappers[id(value)])
+        profiler, cls = self, type(libapron)
+
+        class ProfiledCDLL(cls):
+            def __getattr__(self, name: str):
+                if name.startswith('__') and name.endswith('__'):
+                    raise AttributeError(name)
+                function = cls.__getitem__(self, name)
+                profiler._originals[name] = function
+                wrapper = profiler._wrap(function)
+                setattr(self, name, wrapper)
+                return wrapper
+
+            def __getitem__(self, name_or_ordinal):
+                return profiler._wrap(cls.__getitem__(self, name_or_ordinal))
+
+        self._class = cls
+        libapron.__class__ = ProfiledCDLL
+        return self
+
+    def disable(self):
+        if self._class is not None:
+            libapron.__class__ = self._class
+            self._class = None
+        for name, function in self._originals.items():
+            setattr(libapron, name, function)
+        for module, name, function in self._aliases:
+            setattr(module, name, function)
+        self._originals.clear()
+        self._aliases.clear()
+        return self
+
+    def reset(self):
+        for statistics in self.statistics.values():
+            statistics.__init__()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        statistics = sorted(self.statistics.items(), key=lambda item: -item[1].time)
+        return {getattr(key, 'name', key): value.report() for key, value in statistics
+                if value.count}
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.report(), **kwargs)
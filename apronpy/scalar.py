@@ -8,8 +8,9 @@ from abc import ABCMeta
 from copy import deepcopy
 from ctypes import *
 from enum import IntEnum
+from fractions import Fraction
 
-from apronpy.mpfr import MPFR, PyMPFR, Rnd
+from apronpy.mpfr import MPFR, PyMPFR, Rnd, MPFR_get_q
 from apronpy.mpq import PyMPQ, MPQ
 from apronpy.cdll import libapron
 
@@ -74,6 +75,35 @@ class Scalar(Structure):
         else:  # self.discr == Discr.AP_SCALAR_DOUBLE
             return '{}'.format(self.val.dbl)
 
+    def infty(self):
+        """-1: -infty, 0: finite; 1: +infty"""
+        return APRON_scalar_infty(byref(self))
+
+    def __float__(self):
+        value = c_double()
+        APRON_double_set_scalar(byref(value), self, Rnd.MPFR_RNDN)
+        return value.value
+
+    def fraction(self):
+        """exact value of the scalar as a Fraction (or as a float, if it is infinite)"""
+        infty = self.infty()
+        if infty:
+            return infty * float('inf')
+        if self.discr == ScalarDiscr.AP_SCALAR_MPQ:
+            return Fraction('{}'.format(self.val.mpq_ptr.contents))
+        elif self.discr == ScalarDiscr.AP_SCALAR_MPFR:
+            mpq = PyMPQ()
+            MPFR_get_q(mpq, self.val.mpfr_ptr)
+            return Fraction('{}'.format(mpq.mpq))
+        else:  # self.discr == Discr.AP_SCALAR_DOUBLE
+            return Fraction(self.val.dbl)
+
+
+APRON_double_set_scalar = libapron.ap_double_set_scalar
+APRON_double_set_scalar.argtypes = [POINTER(c_double), POINTER(Scalar), c_int]
+APRON_scalar_infty = libapron['ap_scalar_infty']
+APRON_scalar_infty.argtypes = [POINTER(Scalar)]
+
 
 class PyScalar(metaclass=ABCMeta):
 
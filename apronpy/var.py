@@ -6,8 +6,7 @@ APRON (String) Variables
 """
 from _ctypes import Structure
 from ctypes import CFUNCTYPE, c_int, c_char_p, c_void_p
-
-from apronpy.cdll import libapron
+from weakref import WeakValueDictionary
 
 
 class VarOperations(Structure):
@@ -31,42 +30,66 @@ class VarOperations(Structure):
 
 
 class PyVar:
+    """variable, identified by its name
+
+    Variables are interned: all variables with the same name (but those obtained by deepcopy)
+    are the same object, which caches the encoded name. Variables are compared by their encoded
+    names, consistently with the default comparison (i.e., strcmp) of the library.
+    """
+
+    __slots__ = ('var', '_bytes', '__weakref__')
+    _interned: 'WeakValueDictionary[str, PyVar]' = WeakValueDictionary()
 
-    def __init__(self, name: str):
-        self.var = name
+    def __new__(cls, name: str):
+        var = cls._interned.get(name)
+        if var is None:
+            var = cls._make(name)
+            cls._interned[name] = var
+        return var
+
+    @classmethod
+    def _make(cls, name: str):
+        var = super().__new__(cls)
+        var.var = name
+        var._bytes = name.encode('utf-8')
+        return var
 
     def __deepcopy__(self, memodict=None):
         if memodict is None:
             memodict = {}
-        result = PyVar(self.var)
+        result = self._make(self.var)
         memodict[id(self)] = result
         return result
 
+    def __reduce__(self):
+        return type(self), (self.var,)
+
     @property
     def _as_parameter_(self):
-        return self.var.encode('utf-8')
+        return self._bytes
 
     @staticmethod
     def from_param(argument):
         assert isinstance(argument, PyVar)
-        return argument.var.encode('utf-8')
+        return argument._bytes
 
     def __repr__(self):
         return self.var
 
+    def __hash__(self):
+        return hash(self._bytes)
+
     def __lt__(self, other: 'PyVar'):
         assert isinstance(other, PyVar)
-        operations = VarOperations.in_dll(libapron, 'ap_var_operations_default')
-        return operations.compare(self, other) < 0
+        return self._bytes < other._bytes
 
     def __le__(self, other: 'PyVar'):
         assert isinstance(other, PyVar)
-        return self.__lt__(other) or self.__eq__(other)
+        return self._bytes <= other._bytes
 
     def __eq__(self, other):
         assert isinstance(other, PyVar)
-        operations = VarOperations.in_dll(libapron, 'ap_var_operations_default')
-        return operations.compare(self, other) == 0
+        return self is other or self._bytes == other._bytes
 
     def __ne__(self, other):
         assert isinstance(other, PyVar)
@@ -74,9 +97,8 @@ class PyVar:
 
     def __ge__(self, other):
         assert isinstance(other, PyVar)
-        return self.__gt__(other) or self.__eq__(other)
+        return self._bytes >= other._bytes
 
     def __gt__(self, other):
         assert isinstance(other, PyVar)
-        operations = VarOperations.in_dll(libapron, 'ap_var_operations_default')
-        return operations.compare(self, other) > 0
+        return self._bytes > other._bytes
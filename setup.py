@@ -10,4 +10,5 @@ setup(
     long_description_content_type='text/markdown',
     url='https://github.com/caterinaurban/apronpy',
     packages=find_packages(),
+    extras_require={'numpy': ['numpy', 'scipy']},
 )
@@ -0,0 +1,93 @@
+"""
+Adaptive Abstract Values - Unit Tests
+=====================================
+
+:Author: Caterina Urban
+"""
+import unittest
+
+from apronpy.adaptive import Ladder
+from apronpy.box import PyBox, PyBoxDManager
+from apronpy.coeff import PyMPQScalarCoeff
+from apronpy.environment import PyEnvironment
+from apronpy.lincons0 import ConsTyp
+from apronpy.lincons1 import PyLincons1, PyLincons1Array
+from apronpy.linexpr1 import PyLinexpr1
+from apronpy.manager import FunId, Exc
+from apronpy.oct import PyOct
+from apronpy.polka import PyPolka
+from apronpy.var import PyVar
+
+
+def constraints(e: PyEnvironment):
+    """x - y >= 0 ∧ -x + 10 >= 0 ∧ y >= 0"""
+    x = PyLinexpr1(e)
+    x.set_coeff(PyVar('x'), PyMPQScalarCoeff(1))
+    x.set_coeff(PyVar('y'), PyMPQScalarCoeff(-1))
+    y = PyLinexpr1(e)
+    y.set_coeff(PyVar('x'), PyMPQScalarCoeff(-1))
+    y.set_cst(PyMPQScalarCoeff(10))
+    z = PyLinexpr1(e)
+    z.set_coeff(PyVar('y'), PyMPQScalarCoeff(1))
+    lincons = [PyLincons1(ConsTyp.AP_CONS_SUPEQ, expr) for expr in (x, y, z)]
+    return PyLincons1Array(lincons)
+
+
+class TestPyAdaptive(unittest.TestCase):
+
+    def test_demote(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')])
+        ladder = Ladder()
+        a = ladder.from_constraints(e, constraints(e))
+        self.assertEqual(a.domain, PyPolka)
+        self.assertEqual(a.demote().domain, PyOct)
+        b = a.demote().demote()
+        self.assertEqual(b.domain, PyBox)
+        self.assertEqual(b.demote().domain, PyBox)
+        self.assertEqual(ladder.demotions, 3)
+        self.assertTrue(a <= b)
+        self.assertFalse(b <= a)
+        self.assertEqual(a.join(b).domain, PyBox)
+
+    def test_convert(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')])
+        ladder = Ladder()
+        b = PyBox.from_constraints(PyBoxDManager(), e, constraints(e))
+        c = ladder.convert(b, 2)
+        self.assertIs(c.manager, ladder.domains[2][1])
+        self.assertEqual(str(c), str(b))
+
+    def test_budget(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')])
+        ladder = Ladder(size_budget=0)
+        a = ladder.top(e).meet(constraints(e))
+        self.assertEqual(a.domain, PyBox)
+        self.assertTrue(ladder.demotions > 0)
+
+    def test_promote(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')])
+        ladder = Ladder(promote_after=1)
+        a = ladder.top(e, rung=2).meet(constraints(e))
+        self.assertEqual(a.domain, PyOct)
+        self.assertEqual(ladder.promotions, 1)
+        self.assertEqual(a.promote().domain, PyPolka)
+
+    def test_timeout(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')])
+        ladder = Ladder(time_budget=0.5, timeout=1000)
+        _, manager = ladder.domains[1]
+        default = manager.get_option(FunId.AP_FUNID_JOIN)
+        with ladder.budgets(1):
+            self.assertEqual(manager.get_option(FunId.AP_FUNID_JOIN)['timeout'], 1000)
+            self.assertEqual(manager.on_exception, 'raise')
+        self.assertEqual(manager.get_option(FunId.AP_FUNID_JOIN), default)
+        self.assertEqual(manager.on_exception, 'ignore')
+        a = ladder.from_constraints(e, constraints(e))
+        b = a.demote()
+        manager.manager.contents.result.exn = Exc.AP_EXC_TIMEOUT   # while converting a
+        self.assertEqual(a.join(b).domain, PyBox)
+        self.assertEqual(manager.on_exception, 'ignore')
+
+
+if __name__ == '__main__':
+    unittest.main()
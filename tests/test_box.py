@@ -4,12 +4,19 @@ APRON Boxes - Unit Tests
 
 :Author: Caterina Urban
 """
+import pickle
 import unittest
 from copy import deepcopy
+from fractions import Fraction
+from importlib.util import find_spec
 
 from apronpy.box import PyBox, PyBoxDManager, PyBoxMPQManager, PyBoxMPFRManager
 from apronpy.environment import PyEnvironment
+from apronpy.coeff import PyMPQScalarCoeff
 from apronpy.interval import PyDoubleInterval, PyMPQInterval, PyMPFRInterval
+from apronpy.lincons0 import ConsTyp
+from apronpy.lincons1 import PyLincons1, PyLincons1Array
+from apronpy.linexpr1 import PyLinexpr1
 from apronpy.manager import PyManager
 from apronpy.texpr0 import TexprOp, TexprRtype, TexprRdir
 from apronpy.texpr1 import PyTexpr1
@@ -106,6 +113,51 @@ class TestPyDBox(unittest.TestCase):
         self.assertTrue(b3q.meet(b4) == b3q)
         self.assertTrue(b3f.meet(b4) == b3f)
 
+    def test_join_all(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxDManager()
+        b0 = PyBox.bottom(man, e)
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyDoubleInterval(-2.5, 0.0)])
+        b2 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyDoubleInterval(0.0, 2.5)])
+        b3 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyDoubleInterval(0.0, 0.0)])
+        b4 = PyBox.top(man, e)
+        self.assertTrue(PyBox.join_all([b0]) == b0)
+        self.assertTrue(PyBox.join_all([b0, b1, b3]) == b1)
+        self.assertTrue(PyBox.join_all([b1, b2, b3]) == b1.join(b2))
+        self.assertTrue(PyBox.join_all([b1, b2, b4]) == b4)
+
+    def test_join_environments(self):
+        e1 = PyEnvironment([PyVar('x0')])
+        e2 = PyEnvironment([PyVar('x0'), PyVar('y')])
+        man: PyManager = PyBoxDManager()
+        b1 = PyBox(man, e1, variables=[PyVar('x0')], intervals=[PyDoubleInterval(-2.5, 0.0)])
+        variables = [PyVar('x0'), PyVar('y')]
+        intervals = [PyDoubleInterval(0.0, 2.5), PyDoubleInterval(0.0, 1.0)]
+        b2 = PyBox(man, e2, variables=variables, intervals=intervals)
+        for b in (b1.join(b2), b2.join(b1), PyBox.join_all([b1, b2])):
+            self.assertEqual(b.environment, e2)
+            self.assertEqual(b.bound_variable(PyVar('x0')), PyDoubleInterval(-2.5, 2.5))
+            self.assertTrue(b.bound_variable(PyVar('y')).is_top())
+        self.assertEqual(b1.environment, e1)
+        b = PyBox.meet_all([b1, b2])
+        self.assertEqual(b.environment, e2)
+        self.assertEqual(b.bound_variable(PyVar('x0')), PyDoubleInterval(0.0, 0.0))
+        self.assertEqual(b.bound_variable(PyVar('y')), PyDoubleInterval(0.0, 1.0))
+        b1.join(b2, destructive=True)
+        self.assertEqual(b1.environment, e2)
+
+    def test_meet_all(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxDManager()
+        b0 = PyBox.bottom(man, e)
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyDoubleInterval(-2.5, 0.0)])
+        b2 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyDoubleInterval(0.0, 2.5)])
+        b3 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyDoubleInterval(0.0, 0.0)])
+        b4 = PyBox.top(man, e)
+        self.assertTrue(PyBox.meet_all([b4]) == b4)
+        self.assertTrue(PyBox.meet_all([b1, b2, b4]) == b3)
+        self.assertTrue(PyBox.meet_all([b0, b1, b2]) == b0)
+
 
 class TestPyMPQBox(unittest.TestCase):
 
@@ -154,6 +206,15 @@ class TestPyMPQBox(unittest.TestCase):
         b = PyBox(man, e, variables=variables, intervals=intervals)
         self.assertEqual(str(b.bound_variable(PyVar('y'))), '[-2,2]')
 
+    def test_bound_dim(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        variables = [PyVar('x0'), PyVar('y')]
+        intervals = [PyMPQInterval(-3, 2), PyMPQInterval(-2, 2, 1, 1)]
+        b = PyBox(man, e, variables=variables, intervals=intervals)
+        self.assertEqual(str(b.bound_dim(e.dim_of(PyVar('y')))), '[-2,2]')
+        self.assertEqual(str(b.bound_dim(0)), str(b.bound_variable(PyVar('x0'))))
+
     def test_bound_texpr(self):
         e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
         man: PyManager = PyBoxMPQManager()
@@ -173,6 +234,132 @@ class TestPyMPQBox(unittest.TestCase):
         b = PyBox(man, e, variables=variables, intervals=intervals)
         self.assertEqual(str(b.forget([PyVar('y')])), '1·x0 + 3 >= 0 ∧ -1·x0 + 2 >= 0')
 
+    def test_forget_dims(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        variables = [PyVar('x0'), PyVar('y')]
+        intervals = [PyMPQInterval(-3, 2), PyMPQInterval(-2, 2, 1, 1)]
+        b = PyBox(man, e, variables=variables, intervals=intervals)
+        self.assertTrue(b.forget_dims([1]) == b.forget([PyVar('y')]))
+        b.forget_dims([0, 1], destructive=True)
+        self.assertTrue(b.is_top())
+
+    def test_serialize(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        variables = [PyVar('x0'), PyVar('y')]
+        intervals = [PyMPQInterval(-3, 2), PyMPQInterval(-5, 3, 2, 1)]
+        b = PyBox(man, e, variables=variables, intervals=intervals)
+        self.assertTrue(PyBox.deserialize(man, b.serialize()) == b)
+        self.assertTrue(PyBox.deserialize(man, PyBox.bottom(man, e).serialize()).is_bottom())
+        self.assertTrue(PyBox.deserialize(man, PyBox.top(man, e).serialize()).is_top())
+        c = pickle.loads(pickle.dumps(b))
+        self.assertEqual(type(c), PyBox)
+        self.assertEqual(str(c.environment), str(e))
+        self.assertEqual(str(c), str(b))
+
+    def test_widening_threshold(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 1)])
+        b2 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 2)])
+        b3 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 10)])
+        x = PyLinexpr1(e)
+        x.set_coeff(PyVar('x0'), PyMPQScalarCoeff(-1))
+        x.set_cst(PyMPQScalarCoeff(10))
+        thresholds = PyLincons1Array([PyLincons1(ConsTyp.AP_CONS_SUPEQ, x)])
+        self.assertTrue(b1.widening_threshold(b2, thresholds) == b3)
+        self.assertTrue(b1.delayed_widening(b2, 0) == b2)
+        self.assertTrue(b1.delayed_widening(b2, 1) == b1.widening(b2))
+        self.assertTrue(b1.delayed_widening(b2, 1, thresholds=thresholds) == b3)
+
+    def test_narrowing(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 1)])
+        b2 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 2)])
+        b3 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 10)])
+        b4 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(1, 5)])
+        self.assertTrue(b1.widening(b2).narrowing(b3) == b3)
+        self.assertTrue(b3.narrowing(b4) == b3)
+
+    def test_destructive(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        variables = [PyVar('x0'), PyVar('y')]
+        intervals = [PyMPQInterval(-3, 2), PyMPQInterval(-2, 2, 1, 1)]
+        b = PyBox(man, e, variables=variables, intervals=intervals)
+        c = b.forget([PyVar('y')], destructive=True)
+        self.assertEqual(id(b), id(c))
+        self.assertEqual(str(b), '1·x0 + 3 >= 0 ∧ -1·x0 + 2 >= 0')
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-5, 0, 2, 1)])
+        b2 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 5, 1, 2)])
+        b3 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(0, 0, 1, 1)])
+        b4 = b1.meet(b2)
+        self.assertNotEqual(id(b1), id(b4))
+        self.assertTrue(b1.meet(b2, destructive=True) == b3)
+        self.assertTrue(b1 == b3)
+        self.assertTrue(b4 == b3)
+
+    def test_hash(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        b2 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        self.assertEqual(hash(b1), hash(b2))
+        self.assertEqual(len({b1, b2, PyBox.top(man, e)}), 2)
+        f = PyEnvironment([PyVar('x0')])
+        b3 = PyBox(man, f, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        self.assertFalse(b1 == b3)
+        self.assertEqual(len({b1, b2, b3}), 2)
+
+    def test_to_box(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        variables = [PyVar('x0'), PyVar('y')]
+        intervals = [PyMPQInterval(-3, 2), PyMPQInterval(-2, 2, 1, 1)]
+        b = PyBox(man, e, variables=variables, intervals=intervals)
+        box = b.to_box()
+        self.assertEqual(len(box), 3)
+        self.assertTrue(box[0] == PyMPQInterval(-3, 2))
+        self.assertTrue(box[1] == PyMPQInterval(-2, 2, 1, 1))
+        self.assertTrue(box[2].is_top())
+
+    def test_from_bounds(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        inf = float('inf')
+        b1 = PyBox.from_bounds(man, e, [-3, -2, -inf], [2, 2, inf])
+        variables = [PyVar('x0'), PyVar('y')]
+        intervals = [PyMPQInterval(-3, 2), PyMPQInterval(-2, 2, 1, 1)]
+        b2 = PyBox(man, e, variables=variables, intervals=intervals)
+        self.assertTrue(b1 == b2)
+        self.assertTrue(PyBox.from_bounds(man, e, [1, 0, 0], [0, 0, 0]).is_bottom())
+
+    @unittest.skipIf(find_spec('numpy') is None, 'NumPy is not installed')
+    def test_to_box_numpy(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        b = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-1, 1, 3, 3)])
+        lower, upper = b.to_box('float')
+        self.assertTrue(lower[0] <= -1 / 3 <= upper[0])
+        self.assertEqual(list(lower[1:]), [float('-inf')] * 2)
+        self.assertEqual(list(upper[1:]), [float('inf')] * 2)
+        lower, upper = b.to_box('fraction')
+        self.assertEqual((lower[0], upper[0]), (Fraction(-1, 3), Fraction(1, 3)))
+        self.assertEqual(upper[2], float('inf'))
+        self.assertTrue(b <= PyBox.from_bounds(man, e, *b.to_box('float')))
+
+    def test_minimize(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        b2 = deepcopy(b1)
+        self.assertIs(b1.minimize(), b1)
+        self.assertTrue(b1 == b2)
+        self.assertIs(b1.approximate(), b1)
+        self.assertTrue(b2 <= b1)
+
 
 class TestPyMPFRBox(unittest.TestCase):
 
@@ -0,0 +1,170 @@
+"""
+Caches of Abstract Values - Unit Tests
+======================================
+
+:Author: Caterina Urban
+"""
+import os
+import tempfile
+import unittest
+
+from apronpy.box import PyBox, PyBoxMPQManager
+from apronpy.cache import HashConsTable, SummaryCache, TransferCache
+from apronpy.environment import PyEnvironment
+from apronpy.coeff import PyMPQScalarCoeff, PyDoubleScalarCoeff, PyMPFRScalarCoeff
+from apronpy.interval import PyMPQInterval
+from apronpy.linexpr1 import PyLinexpr1
+from apronpy.manager import PyManager
+from apronpy.texpr0 import TexprOp, TexprRtype, TexprRdir
+from apronpy.texpr1 import PyTexpr1
+from apronpy.var import PyVar
+
+
+class TestHashConsTable(unittest.TestCase):
+
+    def test_intern(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        b0 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        b2 = PyBox.top(man, e)
+        table = HashConsTable()
+        self.assertIs(table.intern(b0), b0)
+        self.assertIs(table.intern(b1), b0)
+        self.assertIs(table.intern(b2), b2)
+        self.assertEqual(len(table), 2)
+        self.assertEqual((table.hits, table.misses), (1, 2))
+        del b0
+        self.assertIs(table.intern(b1), b1)
+
+
+class TestTransferCache(unittest.TestCase):
+
+    def test_apply(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        cache = TransferCache(man)
+        b0 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        x = PyLinexpr1(e)
+        x.set_cst(PyMPQScalarCoeff(3))
+        r0 = b0.assign(PyVar('y'), x)
+        r1 = b1.assign(PyVar('y'), x)
+        self.assertIsNot(r0, r1)
+        self.assertTrue(r0 == r1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        b1.assign(PyVar('z'), x)
+        b1.forget([PyVar('x0')])
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        b1.forget([PyVar('x0')], destructive=True)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertTrue(b1.is_top())
+        cache.detach()
+        self.assertIsNone(man.transfer_cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_unhashed(self):
+        class PyUnhashedBox(PyBox):
+            def _native_hash(self):
+                return None
+
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        cache = TransferCache(man)
+        x0 = [PyVar('x0')]
+        b = [PyUnhashedBox(man, e, variables=x0, intervals=[PyMPQInterval(0, i)]) for i in range(3)]
+        for value in b + b:
+            value.forget(x0)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+
+    def test_fingerprint(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        cache = TransferCache(man)
+        b = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        x1 = PyLinexpr1(e)
+        x1.set_cst(PyMPQScalarCoeff(1, 3))
+        x2 = PyLinexpr1(e)
+        x2.set_cst(PyDoubleScalarCoeff(1 / 3))
+        b.assign(PyVar('z'), x1)
+        b.assign(PyVar('z'), x2)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        x3 = PyLinexpr1(e)
+        x3.set_cst(PyMPFRScalarCoeff(1 / 3))
+        b.assign(PyVar('z'), x3)
+        x0 = PyTexpr1.var(e, PyVar('x0'))
+        for rtype in (TexprRtype.AP_RTYPE_REAL, TexprRtype.AP_RTYPE_INT):
+            half = PyTexpr1.cst(e, PyMPQScalarCoeff(1, 2))
+            t = PyTexpr1.binop(TexprOp.AP_TEXPR_ADD, x0, half, rtype, TexprRdir.AP_RDIR_DOWN)
+            b.assign(PyVar('z'), t)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_eviction(self):
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        cache = TransferCache(man, max_entries=2)
+        x0 = [PyVar('x0')]
+        b = [PyBox(man, e, variables=x0, intervals=[PyMPQInterval(0, i)]) for i in range(3)]
+        for value in b:
+            value.forget(x0)
+        self.assertEqual(len(cache), 2)
+        b[2].forget(x0)
+        b[0].forget(x0)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+
+class TestSummaryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'summaries.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_summarize(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        man: PyManager = PyBoxMPQManager()
+        b0 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        b1 = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        calls = list()
+
+        def compute(value):
+            calls.append(value)
+            return value.forget([PyVar('x0')])
+
+        with SummaryCache(self.path) as cache:
+            self.assertTrue(cache.summarize(b0, 'f', compute).is_top())
+            self.assertTrue(cache.summarize(b1, 'f', compute).is_top())
+            self.assertEqual(len(calls), 1)
+            cache.summarize(b1, 'g', compute)
+            self.assertEqual(len(calls), 2)
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+        with SummaryCache(self.path) as cache:
+            self.assertTrue(cache.get(b0, 'f').is_top())
+            self.assertIsNone(cache.get(PyBox.top(man, e), 'f'))
+
+    def test_eviction(self):
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        x0 = [PyVar('x0')]
+        b = [PyBox(man, e, variables=x0, intervals=[PyMPQInterval(0, i)]) for i in range(3)]
+        with SummaryCache(self.path, max_entries=2) as cache:
+            cache.put(b[0], 'f', b[0])
+            cache.put(b[1], 'f', b[1])
+            self.assertIsNotNone(cache.get(b[0], 'f'))
+            cache.put(b[2], 'f', b[2])
+            self.assertEqual(len(cache), 2)
+            self.assertIsNotNone(cache.get(b[0], 'f'))
+            self.assertIsNone(cache.get(b[1], 'f'))
+            self.assertIsNotNone(cache.get(b[2], 'f'))
+            cache.put(b[2], 'f', b[0])
+            self.assertEqual(len(cache), 2)
+            self.assertTrue(cache.get(b[2], 'f') == b[0])
+        with SummaryCache(self.path, max_entries=2) as cache:
+            self.assertEqual(len(cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,10 +4,13 @@ APRON Environments - Unit Tests
 
 :Author: Caterina Urban
 """
+import pickle
 import unittest
 from copy import deepcopy
+from ctypes import addressof
 
-from apronpy.environment import PyEnvironment
+from apronpy import environment
+from apronpy.environment import PyEnvironment, EnvironmentBuilder
 from apronpy.var import PyVar
 
 
@@ -48,12 +51,41 @@ class TestPyEnvironment(unittest.TestCase):
         self.assertEqual(str(e1.remove([PyVar('x')])), str(e2))
         self.assertRaises(ValueError, e1.remove, [PyVar('w')])
 
+    def test_add_many(self):
+        e1 = PyEnvironment([PyVar('x')], [PyVar('y'), PyVar('z')])
+        e2 = PyEnvironment([PyVar('x')])
+        self.assertEqual(e1, e2.add_many(real_vars=(PyVar(name) for name in 'zy')))
+        self.assertRaises(ValueError, e1.add_many, iter([PyVar('x')]))
+
+    def test_remove_many(self):
+        e1 = PyEnvironment([PyVar('x')], [PyVar('y'), PyVar('z')])
+        e2 = PyEnvironment([PyVar('x')])
+        self.assertEqual(e1.remove_many(PyVar(name) for name in 'zy'), e2)
+        self.assertRaises(ValueError, e1.remove_many, iter([PyVar('w')]))
+
+    def test_builder(self):
+        builder = EnvironmentBuilder()
+        for name in ['t2', 't1', 't2', 't0']:
+            builder.add_real(PyVar(name))
+        builder.add_int(PyVar('i')).add([PyVar('i')], [PyVar('t1')])
+        self.assertEqual(len(builder), 4)
+        self.assertTrue(PyVar('t1') in builder)
+        self.assertEqual(str(builder.build()), '{i|t0,t1,t2}')
+        self.assertEqual(str(EnvironmentBuilder(builder.build()).add([PyVar('j')]).build()),
+                         '{i,j|t0,t1,t2}')
+        self.assertRaises(ValueError, builder.add_real(PyVar('i')).build)
+
     def test_contains(self):
         self.assertTrue(PyVar('x') in PyEnvironment([PyVar('x')], [PyVar('y')]))
         self.assertFalse(PyVar('y') in PyEnvironment([PyVar('x')]))
         self.assertFalse(PyVar('x') not in PyEnvironment([PyVar('x')], [PyVar('y')]))
         self.assertTrue(PyVar('y') not in PyEnvironment([PyVar('x')]))
 
+    def test_dim_of(self):
+        e = PyEnvironment([PyVar('x')], [PyVar('y'), PyVar('z')])
+        self.assertEqual([e.dim_of(PyVar(name)) for name in 'xyz'], [0, 1, 2])
+        self.assertRaises(ValueError, e.dim_of, PyVar('w'))
+
     def test_cmp(self):
         self.assertTrue(PyEnvironment([PyVar('x')]) < PyEnvironment([PyVar('x')], [PyVar('y')]))
         self.assertFalse(PyEnvironment([PyVar('x')]) > PyEnvironment([PyVar('x')]))
@@ -63,6 +95,7 @@ class TestPyEnvironment(unittest.TestCase):
         self.assertFalse(PyEnvironment([PyVar('x')]) < PyEnvironment())
         self.assertTrue(PyEnvironment().add([PyVar('x')]) == PyEnvironment([PyVar('x')]))
         self.assertTrue(PyEnvironment([PyVar('x')]).remove([PyVar('x')]) == PyEnvironment())
+        self.assertEqual(hash(PyEnvironment().add([PyVar('x')])), hash(PyEnvironment([PyVar('x')])))
 
     def test_union(self):
         e1 = PyEnvironment([PyVar('x')], [PyVar('y')])
@@ -75,12 +108,72 @@ class TestPyEnvironment(unittest.TestCase):
         e4 = PyEnvironment([PyVar('x')], [])
         self.assertRaises(ValueError, e4.union, PyEnvironment([], [PyVar('x')]))
 
+    def test_lce(self):
+        e1 = PyEnvironment([PyVar('x')], [PyVar('z')])
+        e2 = PyEnvironment([PyVar('x')], [PyVar('y'), PyVar('z')])
+        e, d1, d2 = e1._lce(e2)
+        self.assertEqual(e, e2)
+        self.assertEqual((d1.contents.intdim, d1.contents.realdim), (0, 1))
+        self.assertEqual(d1.contents.dim[0].value, 1)
+        self.assertFalse(d2)
+        self.assertEqual(e1._lce(e2)[1].contents.dim[0].value, 1)
+
+    def test_lce_eviction(self):
+        maximum, environment.MAX_LCES = environment.MAX_LCES, 2
+        try:
+            environment.clear_interned()
+            e = PyEnvironment([PyVar('x')])
+            for name in ['y', 'z', 'w']:
+                e._lce(PyEnvironment([PyVar(name)]))
+            self.assertEqual(len(environment._lces), 2)
+            self.assertEqual(str(e | PyEnvironment([PyVar('y')])), '{x,y|}')
+        finally:
+            environment.MAX_LCES = maximum
+
     def test_rename(self):
         e1 = PyEnvironment([PyVar('x')], [PyVar('y')])
         e2 = PyEnvironment([PyVar('x')], [PyVar('z')])
         self.assertEqual(e1.rename([PyVar('y')], [PyVar('z')]), e2)
         self.assertRaises(ValueError, e2.rename, [PyVar('x')], [PyVar('z')])
 
+    def test_serialize(self):
+        e1 = PyEnvironment([PyVar('x')], [PyVar('y'), PyVar('z')])
+        self.assertEqual(PyEnvironment.deserialize(e1.serialize()), e1)
+        self.assertEqual(PyEnvironment.deserialize(PyEnvironment().serialize()), PyEnvironment())
+        e2 = pickle.loads(pickle.dumps(e1))
+        self.assertEqual(str(e2), '{x|y,z}')
+
+    def test_interned(self):
+        def address(e: PyEnvironment):
+            return addressof(e.environment.contents)
+        e1 = PyEnvironment([PyVar('x')], [PyVar('y'), PyVar('z')])
+        e2 = PyEnvironment([PyVar('x')], [PyVar('z'), PyVar('y')])
+        self.assertEqual(address(e1), address(e2))
+        e3 = PyEnvironment([PyVar('x')], [PyVar('y')]).add(real_vars=[PyVar('z')])
+        self.assertEqual(address(e1), address(e3))
+        e4 = PyEnvironment([PyVar('x')], [PyVar('w'), PyVar('z')])
+        self.assertEqual(address(e1), address(e4.rename([PyVar('w')], [PyVar('y')])))
+        e5 = PyEnvironment([PyVar('x'), PyVar('w')], [PyVar('y'), PyVar('z')])
+        self.assertEqual(address(e1), address(e5.remove([PyVar('w')])))
+        self.assertRaises(ValueError, e5.remove, [PyVar('w')])
+        self.assertEqual(str(e5), '{x|y,z}')
+        e6 = PyEnvironment([PyVar('x')]) | PyEnvironment([], [PyVar('y'), PyVar('z')])
+        self.assertEqual(address(e1), address(e6))
+        self.assertEqual(address(e1), address(PyEnvironment.deserialize(e1.serialize())))
+
+    def test_interned_sweep(self):
+        maximum, environment.MAX_INTERNED = environment.MAX_INTERNED, 4
+        try:
+            environment.clear_interned()
+            e = PyEnvironment([PyVar('x')])
+            for i in range(100):
+                PyEnvironment([PyVar('x')]).add([PyVar('y{}'.format(i))])
+            self.assertTrue(len(environment._interned) <= 4)
+            self.assertEqual(addressof(e.environment.contents),
+                             addressof(PyEnvironment([PyVar('x')]).environment.contents))
+        finally:
+            environment.MAX_INTERNED = maximum
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,116 @@
+"""
+Fixpoint Computation - Unit Tests
+=================================
+
+:Author: Caterina Urban
+"""
+import unittest
+
+from apronpy.abstract1 import PyAbstract1
+from apronpy.box import PyBox, PyBoxMPQManager
+from apronpy.coeff import PyMPQScalarCoeff
+from apronpy.environment import PyEnvironment
+from apronpy.fixpoint import ControlFlowGraph, FixpointSolver, Assign, Meet, solve_parallel
+from apronpy.interval import PyMPQInterval
+from apronpy.lincons0 import ConsTyp
+from apronpy.lincons1 import PyLincons1, PyLincons1Array
+from apronpy.linexpr1 import PyLinexpr1
+from apronpy.manager import PyManager
+from apronpy.oct import PyOct, PyOctMPQManager
+from apronpy.var import PyVar
+
+
+def linexpr(e: PyEnvironment, coeff: int, cst: int):
+    x = PyLinexpr1(e)
+    x.set_coeff(PyVar('x'), PyMPQScalarCoeff(coeff))
+    x.set_cst(PyMPQScalarCoeff(cst))
+    return x
+
+
+def loop(e: PyEnvironment, start: int, bound: int):
+    """x := start; while x < bound: x := x + 1"""
+    cfg = ControlFlowGraph()
+    cfg.add_edge('init', 'head', Assign(PyVar('x'), linexpr(e, 0, start)))
+    guard = PyLincons1Array([PyLincons1(ConsTyp.AP_CONS_SUPEQ, linexpr(e, -1, bound - 1))])
+    cfg.add_edge('head', 'body', Meet(guard))
+    cfg.add_edge('body', 'head', Assign(PyVar('x'), linexpr(e, 1, 1)))
+    exit_guard = PyLincons1Array([PyLincons1(ConsTyp.AP_CONS_SUPEQ, linexpr(e, 1, -bound))])
+    cfg.add_edge('head', 'exit', Meet(exit_guard))
+    return cfg
+
+
+def build(start: int, bound: int):
+    e = PyEnvironment([PyVar('x')])
+    man: PyManager = PyOctMPQManager()
+    return FixpointSolver(loop(e, start, bound), 'init', PyOct.top(man, e))
+
+
+class TestControlFlowGraph(unittest.TestCase):
+
+    def test_wto(self):
+        cfg = ControlFlowGraph()
+        for source, target in [(1, 2), (2, 3), (3, 4), (4, 5), (5, 3), (4, 2), (2, 6)]:
+            cfg.add_edge(source, target)
+        self.assertEqual(str(cfg.wto(1)), '[1, (2 (3 4 5)), 6]')
+        self.assertEqual(str(cfg.wto(3)), '[(3 4 2 5), 6]')
+
+    def test_reachable(self):
+        cfg = ControlFlowGraph()
+        for source, target in [(1, 2), (2, 3), (3, 2), (1, 4)]:
+            cfg.add_edge(source, target)
+        self.assertEqual(cfg.reachable(2), {2, 3})
+        self.assertEqual(cfg.reachable(1), {1, 2, 3, 4})
+
+
+class TestFixpointSolver(unittest.TestCase):
+
+    def test_solve(self):
+        e = PyEnvironment([PyVar('x')])
+        man: PyManager = PyBoxMPQManager()
+        solver = FixpointSolver(loop(e, 0, 100), 'init', PyBox.top(man, e))
+        self.assertEqual(solver.widening_points, {'head'})
+        values = solver.solve()
+        head = PyBox(man, e, variables=[PyVar('x')], intervals=[PyMPQInterval(0, 100)])
+        self.assertTrue(values['head'] == head)
+        body = PyBox(man, e, variables=[PyVar('x')], intervals=[PyMPQInterval(0, 99)])
+        self.assertTrue(values['body'] == body)
+        end = PyBox(man, e, variables=[PyVar('x')], intervals=[PyMPQInterval(100, 100)])
+        self.assertTrue(values['exit'] == end)
+
+    def test_policy(self):
+        e = PyEnvironment([PyVar('x')])
+        man: PyManager = PyBoxMPQManager()
+        minimized = list()
+
+        def policy(value: PyAbstract1):
+            minimized.append(value)
+            return value.minimize()
+
+        solver = FixpointSolver(loop(e, 0, 100), 'init', PyBox.top(man, e), policy=policy)
+        values = solver.solve()
+        head = PyBox(man, e, variables=[PyVar('x')], intervals=[PyMPQInterval(0, 100)])
+        self.assertTrue(values['head'] == head)
+        self.assertTrue(minimized)
+
+    def test_update_edge(self):
+        e = PyEnvironment([PyVar('x')])
+        man: PyManager = PyBoxMPQManager()
+        solver = FixpointSolver(loop(e, 0, 100), 'init', PyBox.top(man, e))
+        solver.solve()
+        values = solver.update_edge('init', 'head', Assign(PyVar('x'), linexpr(e, 0, 5)))
+        head = PyBox(man, e, variables=[PyVar('x')], intervals=[PyMPQInterval(5, 100)])
+        self.assertTrue(values['head'] == head)
+        self.assertTrue(values['init'].is_top())
+
+    def test_solve_parallel(self):
+        e = PyEnvironment([PyVar('x')])
+        man: PyManager = PyOctMPQManager()
+        results = solve_parallel([(build, (0, 100)), (build, (5, 10))], max_workers=2)
+        head0 = PyOct(man, e, variables=[PyVar('x')], intervals=[PyMPQInterval(0, 100)])
+        self.assertTrue(results[0]['head'] == head0)
+        head1 = PyOct(man, e, variables=[PyVar('x')], intervals=[PyMPQInterval(5, 10)])
+        self.assertTrue(results[1]['head'] == head1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,8 +5,10 @@ APRON Linear Constraints (Level 1) - Unit Tests
 :Author: Caterina Urban
 """
 import unittest
+from fractions import Fraction
+from importlib.util import find_spec
 
-from apronpy.coeff import PyDoubleScalarCoeff
+from apronpy.coeff import PyDoubleScalarCoeff, PyMPQScalarCoeff
 from apronpy.environment import PyEnvironment
 from apronpy.lincons0 import ConsTyp
 from apronpy.lincons1 import PyLincons1, PyLincons1Array
@@ -128,6 +130,65 @@ class TestPyLincons1Array(unittest.TestCase):
         a.set(0, c)
         self.assertEqual(str(a), '1.0·y + 0.0 > 0 ∧ 1.0·x + 0.0 > 0')
 
+    def test_from_matrix(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')], [PyVar('z')])
+        A = [[-3.0, 0.0, 9.0], [-1.0, 0.0, 0.0]]
+        constyps = [ConsTyp.AP_CONS_SUPEQ, ConsTyp.AP_CONS_SUP]
+        a = PyLincons1Array.from_matrix(e, A, [8.0, 0.0], constyps)
+        self.assertEqual(str(a), '3.0·x - 9.0·z + 8.0 >= 0 ∧ 1.0·x + 0.0 > 0')
+        a = PyLincons1Array.from_matrix(e, [[1, 0, 0]], [Fraction(1, 2)])
+        self.assertEqual(str(a), '-1·x + 1/2 >= 0')
+
+    @unittest.skipIf(find_spec('scipy') is None, 'SciPy is not installed')
+    def test_from_matrix_sparse(self):
+        from scipy.sparse import csr_matrix
+        e = PyEnvironment([PyVar('x'), PyVar('y')], [PyVar('z')])
+        A = csr_matrix(([9.0, -3.0, -1.0], [2, 0, 0], [0, 2, 3]), shape=(2, 3))
+        a = PyLincons1Array.from_matrix(e, A, [8.0, 0.0])
+        self.assertEqual(str(a), '3.0·x - 9.0·z + 8.0 >= 0 ∧ 1.0·x + 0.0 >= 0')
+        A = csr_matrix(([-1.0, 9.0, -2.0], [0, 2, 0], [0, 3]), shape=(1, 3))
+        a = PyLincons1Array.from_matrix(e, A, [8.0])
+        self.assertEqual(str(a), '3.0·x - 9.0·z + 8.0 >= 0')
+
+    @unittest.skipIf(find_spec('numpy') is None, 'NumPy is not installed')
+    def test_to_matrix(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')], [PyVar('z')])
+        x1 = PyLinexpr1(e)
+        x1.set_coeff(PyVar('x'), PyDoubleScalarCoeff(3))
+        x1.set_coeff(PyVar('z'), PyDoubleScalarCoeff(-9))
+        x1.set_cst(PyDoubleScalarCoeff(8))
+        c1 = PyLincons1(ConsTyp.AP_CONS_SUPEQ, x1)
+        x2 = PyLinexpr1(e)
+        x2.set_coeff(PyVar('x'), PyDoubleScalarCoeff(1))
+        c2 = PyLincons1(ConsTyp.AP_CONS_SUP, x2)
+        A, b, constyps = PyLincons1Array([c1, c2]).to_matrix(sparse=False)
+        self.assertEqual(A.tolist(), [[-3.0, 0.0, 9.0], [-1.0, 0.0, 0.0]])
+        self.assertEqual(b.tolist(), [8.0, 0.0])
+        self.assertEqual(constyps, [ConsTyp.AP_CONS_SUPEQ, ConsTyp.AP_CONS_SUP])
+        a = PyLincons1Array.from_matrix(e, A, b, constyps)
+        self.assertEqual(str(a), '3.0·x - 9.0·z + 8.0 >= 0 ∧ 1.0·x + 0.0 > 0')
+
+    @unittest.skipIf(find_spec('numpy') is None, 'NumPy is not installed')
+    def test_to_matrix_exact(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')], [PyVar('z')])
+        a = PyLincons1Array.from_matrix(e, [[Fraction(1, 3), 0, -1]], [Fraction(1, 7)])
+        A, b, constyps = a.to_matrix(sparse=False, exact=True)
+        self.assertEqual(A.tolist(), [[Fraction(1, 3), 0, -1]])
+        self.assertEqual(b.tolist(), [Fraction(1, 7)])
+        self.assertEqual(str(PyLincons1Array.from_matrix(e, A, b, constyps)), str(a))
+        x = PyLinexpr1(e)
+        x.set_coeff(PyVar('x'), PyMPQScalarCoeff(1))
+        c = PyLincons1(ConsTyp.AP_CONS_EQMOD, x)
+        self.assertRaises(ValueError, PyLincons1Array([c]).to_matrix, sparse=False)
+
+    @unittest.skipIf(find_spec('scipy') is None, 'SciPy is not installed')
+    def test_to_matrix_sparse(self):
+        e = PyEnvironment([PyVar('x'), PyVar('y')], [PyVar('z')])
+        a = PyLincons1Array.from_matrix(e, [[1, 0, 0], [0, 2, -1]], [Fraction(1, 2), 3])
+        A, b, _ = a.to_matrix()
+        self.assertEqual(A.toarray().tolist(), [[1.0, 0.0, 0.0], [0.0, 2.0, -1.0]])
+        self.assertEqual(b.tolist(), [0.5, 3.0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -6,6 +6,7 @@ APRON Linear Expressions (Level 1) - Unit Tests
 """
 import unittest
 from copy import deepcopy
+from fractions import Fraction
 
 from apronpy.coeff import PyDoubleScalarCoeff, PyDoubleIntervalCoeff
 from apronpy.environment import PyEnvironment
@@ -106,6 +107,32 @@ class TestPyLinexpr1(unittest.TestCase):
         x.set_coeff(PyVar('z'), PyDoubleScalarCoeff(-9))
         self.assertEqual(str(x), '-9.0·z + 0.0')
 
+    def test_set_coeff_dim(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        x = PyLinexpr1(e)
+        x.set_coeff_dim(e.dim_of(PyVar('z')), PyDoubleScalarCoeff(-9))
+        self.assertEqual(str(x), '-9.0·z + 0.0')
+
+    def test_from_dict(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        x = PyLinexpr1(e)
+        x.set_coeff(PyVar('x0'), PyDoubleScalarCoeff(3))
+        x.set_coeff(PyVar('z'), PyDoubleScalarCoeff(-9))
+        x.set_cst(PyDoubleScalarCoeff(1))
+        y = PyLinexpr1.from_dict(e, {PyVar('z'): -9.0, PyVar('y'): 0.0, PyVar('x0'): 3.0}, 1.0)
+        self.assertEqual(str(x), str(y))
+        self.assertEqual(y.get_coeff(PyVar('y')), PyDoubleScalarCoeff(0.0))
+        z = PyLinexpr1.from_dict(e, {PyVar('x0'): Fraction(1, 2)})
+        self.assertEqual(z.get_coeff(PyVar('x0')), PyDoubleScalarCoeff(0.5))
+        self.assertRaises(ValueError, PyLinexpr1.from_dict, e, {PyVar('w'): 1})
+
+    def test_from_dims(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')], [PyVar('z')])
+        x = PyLinexpr1.from_dict(e, {PyVar('x0'): 3.0, PyVar('z'): -9.0}, 1.0)
+        y = PyLinexpr1.from_dims(e, [2, 0], [-9.0, 3.0], 1.0)
+        self.assertEqual(str(x), str(y))
+        self.assertRaises(AssertionError, PyLinexpr1.from_dims, e, [0, 0], [1.0, 2.0])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+"""
+APRON Manager - Unit Tests
+==========================
+
+:Author: Caterina Urban
+"""
+import pickle
+import unittest
+
+from apronpy.abstract1 import PyAbstract1
+from apronpy.box import PyBox, PyBoxMPQManager
+from apronpy.environment import PyEnvironment
+from apronpy.manager import PyManager, FunId, Exc, ApronTimeout, ApronOutOfSpace, MemoryTracker
+from apronpy.var import PyVar
+
+
+class TestPyManager(unittest.TestCase):
+
+    def test_set_option(self):
+        man: PyManager = PyBoxMPQManager()
+        default = man.get_option(FunId.AP_FUNID_JOIN)
+        man.set_option(FunId.AP_FUNID_JOIN, algorithm=1, max_object_size=100)
+        option = man.get_option(FunId.AP_FUNID_JOIN)
+        self.assertEqual(option['algorithm'], 1)
+        self.assertEqual(option['max_object_size'], 100)
+        self.assertEqual(option['timeout'], default['timeout'])
+        self.assertEqual(man.get_option(FunId.AP_FUNID_MEET), default)
+
+    def test_options(self):
+        man: PyManager = PyBoxMPQManager()
+        default = man.get_option(FunId.AP_FUNID_CLOSURE)
+        with man.options([FunId.AP_FUNID_JOIN, FunId.AP_FUNID_CLOSURE], algorithm=-1):
+            self.assertEqual(man.get_option(FunId.AP_FUNID_JOIN)['algorithm'], -1)
+            self.assertEqual(man.get_option(FunId.AP_FUNID_CLOSURE)['algorithm'], -1)
+        self.assertEqual(man.get_option(FunId.AP_FUNID_CLOSURE), default)
+
+    def test_pickle(self):
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        man.set_option(FunId.AP_FUNID_JOIN, algorithm=1).handle_exceptions('raise')
+        copy = pickle.loads(pickle.dumps(man))
+        self.assertIsNot(copy, man)
+        self.assertEqual(copy.get_option(FunId.AP_FUNID_JOIN), man.get_option(FunId.AP_FUNID_JOIN))
+        self.assertEqual(copy.on_exception, 'raise')
+        man.register('box')
+        self.assertIs(pickle.loads(pickle.dumps(man)), man)
+        self.assertIs(pickle.loads(pickle.dumps(PyBox.top(man, e))).manager, man)
+
+    def test_handle_exceptions(self):
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        b = PyBox.top(man, e)
+        man.manager.contents.result.exn = Exc.AP_EXC_TIMEOUT
+        b.join(b)
+        self.assertEqual(man.exceptions[Exc.AP_EXC_TIMEOUT], 0)
+        man.handle_exceptions('count')
+        man.manager.contents.result.exn = Exc.AP_EXC_TIMEOUT
+        self.assertTrue(b.join(b).is_top())
+        self.assertEqual(man.exceptions[Exc.AP_EXC_TIMEOUT], 1)
+        self.assertEqual(man.manager.contents.result.exn, Exc.AP_EXC_NONE)
+        man.handle_exceptions('raise')
+        man.manager.contents.result.exn = Exc.AP_EXC_TIMEOUT
+        with self.assertRaises(ApronTimeout):
+            b.join(b)
+        self.assertEqual(man.exceptions[Exc.AP_EXC_TIMEOUT], 2)
+        self.assertTrue(b.join(b).is_top())
+        man.manager.contents.result.exn = Exc.AP_EXC_TIMEOUT
+        with self.assertRaises(ApronTimeout):
+            b.is_leq(b)
+        self.assertEqual(man.exceptions[Exc.AP_EXC_TIMEOUT], 3)
+        self.assertTrue(PyBox.top(man, e).is_top())
+
+    def test_tracker(self):
+        e = PyEnvironment([PyVar('x0'), PyVar('y')])
+        man: PyManager = PyBoxMPQManager()
+        tracker = MemoryTracker(man)
+        b0 = PyBox.top(man, e)
+        b1 = PyBox.top(man, e)
+        self.assertEqual(len(tracker), 2)
+        self.assertEqual(tracker.size, b0.size() + b1.size())
+        del b1
+        self.assertEqual(len(tracker), 1)
+        self.assertEqual(tracker.size, b0.size())
+        tracker.limit = b0.size()
+        with self.assertRaises(ApronOutOfSpace):
+            PyBox.top(man, e)
+        self.assertEqual(len(tracker), 1)
+        shrunk = list()
+        tracker.policy = shrunk.append
+        b2 = PyBox.top(man, e)
+        self.assertEqual(len(shrunk), 2)
+        self.assertEqual(len(tracker), 2)
+        tracker.policy = PyAbstract1.minimize   # cannot shrink boxes
+        b3 = PyBox.top(man, e)
+        self.assertEqual(len(tracker), 3)
+        self.assertGreater(tracker.size, tracker.limit)
+        tracker.detach()
+        self.assertIsNone(man.tracker)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Profiling of APRON Functions - Unit Tests
+=========================================
+
+:Author: Caterina Urban
+"""
+import json
+import unittest
+from ctypes import POINTER, byref
+
+from apronpy.box import PyBox, PyBoxMPQManager
+from apronpy.cdll import libapron
+from apronpy.environment import PyEnvironment
+from apronpy.interval import PyMPQInterval
+from apronpy.manager import PyManager, FunId
+from apronpy.profiler import Profiler, Histogram, funid_of
+from apronpy.scalar import Scalar
+from apronpy.var import PyVar
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_funid_of(self):
+        self.assertEqual(funid_of('ap_abstract1_join'), FunId.AP_FUNID_JOIN)
+        assign = FunId.AP_FUNID_ASSIGN_LINEXPR_ARRAY
+        self.assertEqual(funid_of('ap_abstract1_assign_linexpr'), assign)
+        self.assertEqual(funid_of('ap_abstract1_size'), FunId.AP_FUNID_ASIZE)
+        self.assertEqual(funid_of('ap_environment_alloc'), 'ap_environment_alloc')
+
+    def test_histogram(self):
+        histogram = Histogram()
+        for duration in [0.001] * 98 + [1.0] * 2:
+            histogram.add(duration)
+        self.assertAlmostEqual(histogram.percentile(50), 0.001, delta=0.0002)
+        self.assertAlmostEqual(histogram.percentile(99), 1.0, delta=0.1)
+
+    def test_profile(self):
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        b = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        join = libapron.ap_abstract1_join
+        with Profiler() as profiler:
+            self.assertIsNot(libapron.ap_abstract1_join, join)
+            b.join(b)
+            b.join(b)
+        self.assertIs(libapron.ap_abstract1_join, join)
+        b.join(b)
+        report = profiler.report()
+        self.assertEqual(report['AP_FUNID_JOIN']['count'], 2)
+        self.assertTrue(report['AP_FUNID_JOIN']['max_size'] > 0)
+        self.assertEqual(json.loads(profiler.to_json())['AP_FUNID_JOIN']['count'], 2)
+
+    def test_profile_indexed(self):
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        b = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        scalar = b.bound_variable(PyVar('x0')).interval.contents.inf.contents
+        with Profiler() as profiler:
+            self.assertEqual(scalar.infty(), 0)
+            infty = libapron['ap_scalar_infty']
+            infty.argtypes = [POINTER(Scalar)]
+            self.assertEqual(infty(byref(scalar)), 0)
+        self.assertEqual(profiler.report()['ap_scalar_infty']['count'], 2)
+        self.assertIsInstance(libapron['ap_scalar_infty'], libapron._FuncPtr)
+
+    def test_profile_flags(self):
+        e = PyEnvironment([PyVar('x0')])
+        man: PyManager = PyBoxMPQManager()
+        b = PyBox(man, e, variables=[PyVar('x0')], intervals=[PyMPQInterval(-3, 2)])
+        b.join(b)
+        flags = (man.flag_exact, man.flag_best)
+        with Profiler():
+            b.join(b)
+            self.assertEqual((man.flag_exact, man.flag_best), flags)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ APRON Scalar Numbers - Unit Tests
 import unittest
 from copy import deepcopy
 from ctypes import c_double
+from fractions import Fraction
 
 from apronpy.mpfr import PyMPFR
 from apronpy.mpq import PyMPQ
@@ -142,6 +143,17 @@ class TestPyMPFRScalar(unittest.TestCase):
         self.assertEqual(PyMPFRScalar.init_infty(-9).infty(), -1)
         self.assertEqual(PyMPFRScalar.init_infty(0).infty(), 1)  # !
         self.assertEqual(PyMPFRScalar.init_infty(9).infty(), 1)
+        huge = PyMPFRScalar(PyMPFR(1e308) * PyMPFR(10))     # finite, but beyond doubles
+        self.assertEqual(huge.infty(), 0)
+        self.assertEqual(huge.scalar.contents.infty(), 0)
+        self.assertEqual(PyMPFRScalar.init_infty(-9).scalar.contents.infty(), -1)
+
+    def test_fraction(self):
+        huge = PyMPFRScalar(PyMPFR(2.0 ** 1000) * PyMPFR(2.0 ** 100))
+        self.assertEqual(huge.scalar.contents.fraction(), Fraction(2 ** 1100))
+        tiny = PyMPFRScalar(PyMPFR(2.0 ** -1000) * PyMPFR(2.0 ** -100))
+        self.assertEqual(tiny.scalar.contents.fraction(), Fraction(1, 2 ** 1100))
+        self.assertEqual(PyMPFRScalar.init_infty(-9).scalar.contents.fraction(), float('-inf'))
 
     def test_deepcopy(self):
         s0 = PyMPFRScalar(9)
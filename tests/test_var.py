@@ -4,6 +4,7 @@ APRON (String) Variables - Unit Tests
 
 :Author: Caterina Urban
 """
+import pickle
 import unittest
 from copy import deepcopy
 
@@ -29,6 +30,19 @@ class TestPyVar(unittest.TestCase):
         self.assertTrue(PyVar('x0') == PyVar('x0'))
         self.assertFalse(PyVar('X') > PyVar('x0'))
         self.assertTrue(PyVar('y') > PyVar('x0'))
+        variables = [PyVar('y'), PyVar('X'), PyVar('x0')]
+        self.assertEqual(sorted(variables), [PyVar('X'), PyVar('x0'), PyVar('y')])
+
+    def test_interned(self):
+        self.assertEqual(id(PyVar('x0')), id(PyVar('x0')))
+        x0 = PyVar('x0')
+        self.assertEqual(id(pickle.loads(pickle.dumps(x0))), id(x0))
+        self.assertEqual(PyVar('x0')._as_parameter_, b'x0')
+
+    def test_hash(self):
+        d = {PyVar('x0'): 0, PyVar('y'): 1}
+        self.assertEqual(d[PyVar('y')], 1)
+        self.assertEqual(d[deepcopy(PyVar('x0'))], 0)
 
 
 if __name__ == '__main__':